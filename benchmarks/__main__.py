@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+from os.path import abspath, basename, dirname, exists, join, splitext
+from glob import glob
+import tracemalloc
+import json
+import time
+import sys
+import os
+
+from textmation.parser import parse
+from textmation.scenebuilder import SceneBuilder
+from textmation.optimizations import optimize
+from textmation.prepare import prepare
+from textmation.renderer import Renderer, iter_frame_time
+from textmation.exporters import GifExporter
+
+from .stress import stress_scenes
+
+
+_benchmarks_dir = dirname(abspath(__file__))
+_examples_dir = abspath(join(_benchmarks_dir, os.pardir, "examples"))
+_default_baseline = join(_benchmarks_dir, "baseline.json")
+
+stages = "parse", "build", "optimize", "compute", "render", "save_gif"
+
+# Differences below this many seconds are considered noise
+_time_noise = 0.001
+
+
+class Measurements:
+	def __init__(self, *, trace=False):
+		self.trace = trace
+		self.times = dict.fromkeys(stages, 0.0)
+		self.peaks = dict.fromkeys(stages, 0)
+
+	@contextmanager
+	def measure(self, stage):
+		if self.trace:
+			tracemalloc.reset_peak()
+			current = tracemalloc.get_traced_memory()[0]
+
+		begin = time.perf_counter()
+		yield
+		self.times[stage] += time.perf_counter() - begin
+
+		if self.trace:
+			peak = tracemalloc.get_traced_memory()[1] - current
+			self.peaks[stage] = max(self.peaks[stage], peak)
+
+
+def _run(source, search_path, measurements, max_frames=None):
+	with measurements.measure("parse"):
+		tree = parse(source)
+
+	with measurements.measure("build"):
+		builder = SceneBuilder()
+		builder.search_paths.append(search_path)
+		scene = builder.build(tree)
+
+	with measurements.measure("optimize"):
+		scene = optimize(scene)
+
+	# Downloads missing images and fonts, which isn't what's being measured
+	scene = prepare(scene)
+
+	duration = scene.p_duration.seconds
+	frame_rate = scene.p_frame_rate
+	inclusive = bool(scene.p_inclusive)
+
+	renderer = Renderer()
+	previous = None
+
+	with TemporaryDirectory() as dirname:
+		exporter = GifExporter(join(dirname, "output.gif"), frame_rate)
+
+		for frame, t in iter_frame_time(duration, frame_rate, inclusive=inclusive):
+			if max_frames is not None and frame >= max_frames:
+				break
+
+			with measurements.measure("compute"):
+				scene.compute(t)
+
+			with measurements.measure("render"):
+				image = renderer.render(scene)
+
+			with measurements.measure("save_gif"):
+				exporter.write(image)
+
+			if (previous is not None) and (previous is not image):
+				renderer.release(previous)
+			previous = image
+
+		with measurements.measure("save_gif"):
+			exporter.close()
+
+
+def benchmark(source, search_path, *, repeat=3, max_frames=None):
+	times = None
+
+	for _ in range(repeat):
+		measurements = Measurements()
+		_run(source, search_path, measurements, max_frames)
+
+		if times is None:
+			times = measurements.times
+		else:
+			times = {stage: min(times[stage], measurements.times[stage]) for stage in stages}
+
+	# Tracing slows down every allocation, so memory is measured separately
+	measurements = Measurements(trace=True)
+	tracemalloc.start()
+	try:
+		_run(source, search_path, measurements, max_frames)
+	finally:
+		tracemalloc.stop()
+
+	return {stage: {"time": times[stage], "peak": measurements.peaks[stage]} for stage in stages}
+
+
+def iter_scenes():
+	for filename in sorted(glob(join(_examples_dir, "*.anim"))):
+		with open(filename) as f:
+			yield splitext(basename(filename))[0], f.read()
+
+	for name, create in stress_scenes.items():
+		yield name, create()
+
+
+def _format_change(value, baseline):
+	if not baseline:
+		return ""
+	return f"{(value - baseline) / baseline * 100:+.1f}%"
+
+
+def _is_regression(result, baseline, threshold):
+	if baseline is None:
+		return False
+
+	slower = result["time"] - baseline["time"]
+	if slower > max(baseline["time"] * threshold, _time_noise):
+		return True
+
+	return result["peak"] > baseline["peak"] * (1 + threshold)
+
+
+def _print_results(results, baseline, threshold):
+	regressions = 0
+
+	for stage in stages:
+		result = results[stage]
+		base = baseline.get(stage) if baseline else None
+
+		time_change = _format_change(result["time"], base and base["time"])
+		peak_change = _format_change(result["peak"], base and base["peak"])
+
+		regression = _is_regression(result, base, threshold)
+		if regression:
+			regressions += 1
+
+		print(
+			f"  {stage:<10}"
+			f"{result['time'] * 1000:>10.2f} ms {time_change:>8}"
+			f"{result['peak'] / 1024:>12.1f} KiB {peak_change:>8}"
+			+ ("  REGRESSION" if regression else ""))
+
+	return regressions
+
+
+def main():
+	args_parser = ArgumentParser(prog="python -m benchmarks", description="Benchmark every stage of the pipeline, on the examples and on synthetic stress scenes")
+	args_parser.add_argument("names", nargs="*", help="Only run scenes containing any of these names")
+	args_parser.add_argument("--baseline", default=_default_baseline, help="Baseline JSON file to compare against")
+	args_parser.add_argument("--save", action="store_const", const=True, default=False, help="Store the results in the baseline file")
+	args_parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs, the fastest is reported")
+	args_parser.add_argument("--frames", type=int, default=None, help="Maximum number of frames rendered per scene")
+	args_parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown or memory growth reported as a regression")
+
+	args = args_parser.parse_args()
+
+	baselines = {}
+	if exists(args.baseline):
+		with open(args.baseline) as f:
+			baselines = json.load(f)
+
+	regressions = 0
+
+	for name, source in iter_scenes():
+		if args.names and not any(filter_name in name for filter_name in args.names):
+			continue
+
+		print(name, flush=True)
+
+		results = benchmark(source, _examples_dir, repeat=args.repeat, max_frames=args.frames)
+		regressions += _print_results(results, baselines.get(name), args.threshold)
+
+		if args.save:
+			baselines[name] = results
+
+	if args.save:
+		with open(args.baseline, "w") as f:
+			json.dump(baselines, f, indent=4, sort_keys=True)
+		print(f"Saved baseline: {args.baseline}")
+	elif regressions:
+		print(f"{regressions} regression(s) compared to {args.baseline}", file=sys.stderr)
+		return 1
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
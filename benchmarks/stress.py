@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Synthetic scenes, each stressing a different part of the pipeline
+
+
+def many_elements(count=2000):
+	lines = ["width = 800", "height = 600", "frame_rate = 10", "duration = 1s", ""]
+
+	for i in range(count):
+		lines += [
+			"create Rectangle",
+			f"    x = {i * 13 % 800}",
+			f"    y = {i * 7 % 600}",
+			"    width = 5%",
+			"    height = 10",
+			f"    fill = rgb({i % 256}, {i * 7 % 256}, 200)",
+			"",
+		]
+
+	return "\n".join(lines)
+
+
+def many_animations(count=200):
+	lines = ["width = 400", "height = 400", "frame_rate = 30", ""]
+
+	for i in range(count):
+		lines += [
+			"create Rectangle",
+			f"    y = {i * 2 % 400}",
+			"    width = 20",
+			"    height = 20",
+			"    create Animation",
+			f"        delay = {i * 10}ms",
+			"        iterations = 3",
+			"        direction = Alternate",
+			"        create Keyframe",
+			"            time = 0s",
+			"            x = 0",
+			"            fill = rgb(255, 0, 0)",
+			"        create Keyframe",
+			"            time = 500ms",
+			"            x = 380",
+			"            fill = rgb(0, 0, 255)",
+			"",
+		]
+
+	return "\n".join(lines)
+
+
+def long_keyframe_track(count=500):
+	lines = [
+		"width = 400",
+		"height = 400",
+		"frame_rate = 30",
+		"",
+		"create Rectangle",
+		"    width = 20",
+		"    height = 20",
+		"    create Animation",
+	]
+
+	for i in range(count):
+		lines += [
+			"        create Keyframe",
+			f"            time = {i * 50}ms",
+			f"            x = {i * 37 % 380}",
+			f"            y = {i * 53 % 380}",
+		]
+
+	return "\n".join(lines)
+
+
+def reference_chain(length=300):
+	lines = ["width = 400", "height = 400", "frame_rate = 10", "duration = 1s", "", "a0 := 1"]
+
+	for i in range(1, length):
+		lines.append(f"a{i} := a{i - 1} + 1")
+
+	lines += [
+		"",
+		"create Rectangle",
+		f"    width = a{length - 1}",
+		"    height = 20",
+	]
+
+	return "\n".join(lines)
+
+
+stress_scenes = {
+	"stress_many_elements": many_elements,
+	"stress_many_animations": many_animations,
+	"stress_long_keyframe_track": long_keyframe_track,
+	"stress_reference_chain": reference_chain,
+}
@@ -3,7 +3,6 @@ use image::{
     GenericImage, GenericImageView,
     RgbaImage,
     Rgba,
-    imageops::resize,
     imageops::FilterType,
 };
 
@@ -11,10 +10,11 @@ use rusttype::{
     FontCollection,
     Font,
     Scale,
-    point,
 };
 
 use crate::rect::Rect;
+use crate::resample::ResampleCache;
+use crate::text::TextCache;
 
 #[inline(always)]
 fn in_bounds(image: &RgbaImage, x: i32, y: i32) -> bool {
@@ -138,7 +138,7 @@ pub fn draw_image_at(image: &mut RgbaImage, top_left: (i32, i32), other: &RgbaIm
     }
 }
 
-pub fn draw_image_mut(image: &mut RgbaImage, rect: &Rect, other: &RgbaImage) {
+pub fn draw_image_mut(image: &mut RgbaImage, rect: &Rect, other: &RgbaImage, cache: &ResampleCache) {
     let image_bounds = Rect::new(0, 0, image.width(), image.height());
     let intersection = image_bounds.intersect(rect);
 
@@ -146,16 +146,18 @@ pub fn draw_image_mut(image: &mut RgbaImage, rect: &Rect, other: &RgbaImage) {
         return;
     }
 
-    if (rect.width != other.width()) || (rect.height != other.height()) {
-        // TODO: Sample instead of resizing
-        let other = resize(other, rect.width, rect.height, FilterType::Triangle);
-        draw_image_at(image, (rect.left, rect.top), &other);
-    } else {
+    if (rect.width == other.width()) && (rect.height == other.height()) {
         draw_image_at(image, (rect.left, rect.top), other);
+        return;
     }
+
+    let filter = FilterType::Triangle;
+
+    let resized = cache.resized(other, rect.width, rect.height, filter);
+    draw_image_at(image, (rect.left, rect.top), &resized);
 }
 
-pub fn draw_text_mut(image: &mut RgbaImage, top_left: (i32, i32), text: &str, font: &Font, scale: Scale, fill: Rgba<u8>) {
+pub fn draw_text_mut(image: &mut RgbaImage, top_left: (i32, i32), text: &str, font: &Font, scale: Scale, fill: Rgba<u8>, cache: &TextCache) {
     let (x, y) = top_left;
     let [r, g, b, a] = fill.data;
 
@@ -163,10 +165,8 @@ pub fn draw_text_mut(image: &mut RgbaImage, top_left: (i32, i32), text: &str, fo
         return;
     }
 
-    let v_metrics = font.v_metrics(scale);
-    let glyphs: Vec<_> = font
-        .layout(text, scale, point(0.0, v_metrics.ascent))
-        .collect();
+    let layout = cache.layout(font, text, scale);
+    let glyphs = &layout.glyphs;
 
     if glyphs.is_empty() {
         return;
@@ -174,13 +174,13 @@ pub fn draw_text_mut(image: &mut RgbaImage, top_left: (i32, i32), text: &str, fo
 
     let (min_x, min_y) = glyphs
         .first()
-        .map(|g| g.pixel_bounding_box().unwrap())
+        .map(|g| g.bounding_box.unwrap())
         .map(|g| (g.min.x, g.min.y))
         .unwrap();
 
     let (max_x, max_y) = glyphs
         .last()
-        .map(|g| g.pixel_bounding_box().unwrap())
+        .map(|g| g.bounding_box.unwrap())
         .map(|g| (g.max.x, g.max.y))
         .unwrap();
 
@@ -196,8 +196,20 @@ pub fn draw_text_mut(image: &mut RgbaImage, top_left: (i32, i32), text: &str, fo
     let a = a as f32;
 
     for glyph in glyphs {
-        if let Some(bounding_box) = glyph.pixel_bounding_box() {
-            glyph.draw(|gx, gy, v| {
+        let bounding_box = match glyph.bounding_box {
+            Some(bounding_box) => bounding_box,
+            None => continue,
+        };
+
+        let coverage = match cache.coverage(font, glyph, scale) {
+            Some(coverage) => coverage,
+            None => continue,
+        };
+
+        for gy in 0..coverage.height {
+            for gx in 0..coverage.width {
+                let v = coverage.values[(gy * coverage.width + gx) as usize];
+
                 let x = x + bounding_box.min.x + gx as i32;
                 let y = y + bounding_box.min.y + gy as i32;
 
@@ -206,7 +218,7 @@ pub fn draw_text_mut(image: &mut RgbaImage, top_left: (i32, i32), text: &str, fo
                         unsafe_put_pixel_blend(image, x as u32, y as u32, Rgba([r, g, b, (v * a) as u8]));
                     }
                 }
-            });
+            }
         }
     }
 }
@@ -386,3 +398,43 @@ pub fn draw_filled_ellipse_mut(image: &mut RgbaImage, center: (i32, i32), radius
         }
     }
 }
+
+// Opcode followed by 8 parameters, see DisplayList in rasterizer.py
+pub const BATCH_COMMAND_SIZE: usize = 9;
+
+const BATCH_RECT: f64 = 1.0;
+const BATCH_LINE: f64 = 2.0;
+const BATCH_CIRCLE: f64 = 3.0;
+const BATCH_ELLIPSE: f64 = 4.0;
+
+pub fn draw_batch_mut(image: &mut RgbaImage, commands: &[f64]) -> Result<(), f64> {
+    for command in commands.chunks(BATCH_COMMAND_SIZE) {
+        let color = Rgba([
+            batch_channel(command[5]),
+            batch_channel(command[6]),
+            batch_channel(command[7]),
+            batch_channel(command[8]),
+        ]);
+
+        let (p1, p2, p3, p4) = (command[1], command[2], command[3], command[4]);
+
+        if command[0] == BATCH_RECT {
+            draw_filled_rect_mut(image, &Rect::new(p1 as i32, p2 as i32, p3 as u32, p4 as u32), color);
+        } else if command[0] == BATCH_LINE {
+            draw_line_segment_mut(image, (p1 as i32, p2 as i32), (p3 as i32, p4 as i32), color);
+        } else if command[0] == BATCH_CIRCLE {
+            draw_filled_circle_mut(image, (p1 as i32, p2 as i32), p3 as u32, color);
+        } else if command[0] == BATCH_ELLIPSE {
+            draw_filled_ellipse_mut(image, (p1 as i32, p2 as i32), (p3 as u32, p4 as u32), color);
+        } else {
+            return Err(command[0]);
+        }
+    }
+
+    Ok(())
+}
+
+#[inline(always)]
+fn batch_channel(value: f64) -> u8 {
+    value.max(0.0).min(255.0) as u8
+}
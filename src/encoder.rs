@@ -0,0 +1,425 @@
+use std::borrow::Cow;
+use std::cmp::{min, max};
+use std::collections::{BTreeMap, VecDeque};
+use std::fs::File;
+use std::io;
+use std::sync::{Arc, Mutex};
+use std::sync::mpsc::{channel, Sender, Receiver};
+use std::thread::{self, JoinHandle};
+
+use image::RgbaImage;
+
+use gif::{Frame, Encoder, Repeat, SetParameter, DisposalMethod};
+
+use color_quant::NeuQuant;
+
+// Upper bound on the pixels sampled for a global palette
+const PALETTE_SAMPLES: usize = 1 << 20;
+
+// The last palette entry is reserved for transparent pixels
+const TRANSPARENT_INDEX: u8 = 255;
+
+// Each worker remembers the nearest palette entry of this many colors
+const COLOR_CACHE_BITS: u32 = 15;
+
+// Colors are 24-bit, so this is never a color
+const EMPTY_SLOT: u32 = u32::max_value();
+
+pub struct Palette {
+    quantizer: NeuQuant,
+    colors: Vec<u8>,
+}
+
+impl Palette {
+    pub fn from_samples(samples: &[&RgbaImage]) -> Palette {
+        let total: usize = samples.iter()
+            .map(|sample| sample.width() as usize * sample.height() as usize)
+            .sum();
+        let step = max(total / PALETTE_SAMPLES, 1);
+
+        let mut pixels = Vec::new();
+
+        for pixel in samples.iter().flat_map(|sample| sample.pixels()).step_by(step) {
+            if pixel.data[3] != 0 {
+                pixels.extend_from_slice(&[pixel.data[0], pixel.data[1], pixel.data[2], 255]);
+            }
+        }
+
+        if pixels.is_empty() {
+            pixels.extend_from_slice(&[0, 0, 0, 255]);
+        }
+
+        let quantizer = NeuQuant::new(10, TRANSPARENT_INDEX as usize, &pixels);
+
+        let mut colors = quantizer.color_map_rgb();
+        colors.resize(256 * 3, 0);
+
+        Palette { quantizer, colors }
+    }
+
+    fn index_of(&self, pixel: &[u8]) -> u8 {
+        if pixel[3] == 0 {
+            TRANSPARENT_INDEX
+        } else {
+            self.quantizer.index_of(&[pixel[0], pixel[1], pixel[2], 255]) as u8
+        }
+    }
+}
+
+// Motion graphics tend to reuse a handful of colors, so the nearest
+// palette entry is remembered for recently seen colors. The table has
+// a fixed size, a color replaces whichever color was in its slot.
+struct ColorCache {
+    slots: Vec<(u32, u8)>,
+}
+
+impl ColorCache {
+    fn new() -> ColorCache {
+        ColorCache { slots: vec![(EMPTY_SLOT, 0); 1 << COLOR_CACHE_BITS] }
+    }
+
+    fn index_of(&mut self, palette: &Palette, pixel: &[u8]) -> u8 {
+        if pixel[3] == 0 {
+            return TRANSPARENT_INDEX;
+        }
+
+        let color = ((pixel[0] as u32) << 16) | ((pixel[1] as u32) << 8) | (pixel[2] as u32);
+        let slot = (color.wrapping_mul(0x9E37_79B1) >> (32 - COLOR_CACHE_BITS)) as usize;
+
+        let (cached, index) = self.slots[slot];
+        if cached == color {
+            return index;
+        }
+
+        let index = palette.index_of(pixel);
+        self.slots[slot] = (color, index);
+
+        index
+    }
+}
+
+struct Job {
+    index: usize,
+    previous: Option<Arc<RgbaImage>>,
+    image: Arc<RgbaImage>,
+}
+
+// Quantizing is the slow part of writing a GIF, so frames are quantized
+// on a pool of worker threads. The LZW compression happens when the
+// encoder writes the frame, which is done in order on the calling thread.
+pub struct GifWriter {
+    encoder: Encoder<File>,
+    width: u16,
+    height: u16,
+    delay: u16,
+    previous: Option<Arc<RgbaImage>>,
+    jobs: Option<Sender<Job>>,
+    frames: Receiver<(usize, Frame<'static>)>,
+    workers: Vec<JoinHandle<()>>,
+    pending: BTreeMap<usize, Frame<'static>>,
+    counts: VecDeque<u16>,
+    submitted: usize,
+    written: usize,
+    // Frames written including repeated frames
+    written_frames: usize,
+}
+
+impl GifWriter {
+    pub fn create(filename: &str, width: u16, height: u16, frame_rate: u16, palette: Option<Palette>) -> io::Result<GifWriter> {
+        let file = File::create(filename)?;
+        let mut encoder = match palette {
+            Some(ref palette) => Encoder::new(file, width, height, &palette.colors)?,
+            None => Encoder::new(file, width, height, &[])?,
+        };
+
+        encoder.set(Repeat::Infinite)?;
+
+        let delay = 1000 / frame_rate;
+
+        let (jobs, job_receiver) = channel();
+        let (frame_sender, frames) = channel();
+
+        let job_receiver = Arc::new(Mutex::new(job_receiver));
+        let palette = palette.map(Arc::new);
+
+        let workers = (0..max(num_cpus::get(), 1))
+            .map(|_| {
+                let jobs = job_receiver.clone();
+                let frames = frame_sender.clone();
+                let palette = palette.clone();
+                thread::spawn(move || worker(jobs, frames, palette))
+            })
+            .collect();
+
+        Ok(GifWriter {
+            encoder, width, height, delay,
+            previous: None,
+            jobs: Some(jobs),
+            frames,
+            workers,
+            pending: BTreeMap::new(),
+            counts: VecDeque::new(),
+            submitted: 0,
+            written: 0,
+            written_frames: 0,
+        })
+    }
+
+    pub fn write_frame(&mut self, image: Arc<RgbaImage>) -> io::Result<()> {
+        if (image.width() != self.width as u32) || (image.height() != self.height as u32) {
+            return Err(io::Error::new(io::ErrorKind::InvalidInput, format!(
+                "Expected {}x{} frame, received {}x{}",
+                self.width, self.height, image.width(), image.height())));
+        }
+
+        let job = Job {
+            index: self.submitted,
+            previous: self.previous.replace(image.clone()),
+            image,
+        };
+
+        self.jobs.as_ref().unwrap().send(job).map_err(|_| worker_error())?;
+        self.submitted += 1;
+        self.counts.push_back(1);
+
+        // Bound the frames in flight, such that memory doesn't grow
+        // when frames are submitted faster than they're quantized
+        let in_flight = self.workers.len() * 2;
+        self.write_ready(in_flight, true)
+    }
+
+    // Consecutive duplicate frames are written once, with the delay of
+    // all of them, instead of emitting the same frame again
+    pub fn repeat_frame(&mut self) {
+        if let Some(count) = self.counts.back_mut() {
+            *count = count.saturating_add(1);
+        }
+    }
+
+    // Number of frames written to the file so far, where a repeated
+    // frame counts once for every time it was given
+    pub fn written_frames(&self) -> usize {
+        self.written_frames
+    }
+
+    // Waits until at least one more of the submitted frames is written,
+    // returns false when every frame was already written
+    pub fn flush_frame(&mut self) -> io::Result<bool> {
+        let remaining = self.submitted - self.written;
+
+        if remaining == 0 {
+            return Ok(false);
+        }
+
+        self.write_ready(remaining - 1, false)?;
+
+        Ok(true)
+    }
+
+    pub fn finish(&mut self) -> io::Result<()> {
+        self.write_ready(0, false)?;
+        self.close_workers();
+        Ok(())
+    }
+
+    fn write_ready(&mut self, in_flight: usize, hold_last: bool) -> io::Result<()> {
+        // Until another frame follows, the last frame might still repeat
+        let hold = if hold_last { 1 } else { 0 };
+
+        loop {
+            while let Ok((index, frame)) = self.frames.try_recv() {
+                self.pending.insert(index, frame);
+            }
+
+            while (self.written + hold) < self.submitted {
+                let mut frame = match self.pending.remove(&self.written) {
+                    Some(frame) => frame,
+                    None => break,
+                };
+
+                let count = self.counts.pop_front().unwrap_or(1);
+                frame.delay = (self.delay / 10).saturating_mul(count);
+
+                self.encoder.write_frame(&frame)?;
+                self.written += 1;
+                self.written_frames += count as usize;
+            }
+
+            if (self.submitted - self.written) <= in_flight {
+                return Ok(());
+            }
+
+            let (index, frame) = self.frames.recv().map_err(|_| worker_error())?;
+            self.pending.insert(index, frame);
+        }
+    }
+
+    fn close_workers(&mut self) {
+        // Workers stop once the job queue is closed
+        self.jobs.take();
+
+        for worker in self.workers.drain(..) {
+            let _ = worker.join();
+        }
+    }
+}
+
+impl Drop for GifWriter {
+    fn drop(&mut self) {
+        self.close_workers();
+    }
+}
+
+fn worker(jobs: Arc<Mutex<Receiver<Job>>>, frames: Sender<(usize, Frame<'static>)>, palette: Option<Arc<Palette>>) {
+    let mut colors = ColorCache::new();
+
+    loop {
+        let job = jobs.lock().unwrap().recv();
+
+        let job = match job {
+            Ok(job) => job,
+            Err(_) => break,
+        };
+
+        let frame = match palette {
+            Some(ref palette) => map_frame(&job, palette, &mut colors),
+            None => quantize_frame(&job),
+        };
+
+        if frames.send((job.index, frame)).is_err() {
+            break;
+        }
+    }
+}
+
+fn worker_error() -> io::Error {
+    io::Error::new(io::ErrorKind::Other, "GIF encoder worker stopped")
+}
+
+fn quantize_frame(job: &Job) -> Frame<'static> {
+    let image: &RgbaImage = &job.image;
+
+    // Frames are kept on screen, so only the area that changed since
+    // the previous frame is written, with the rest left transparent
+    let mut frame = match job.previous {
+        Some(ref previous) => match changed_bounds(previous, image) {
+            Some(bounds) => delta_frame(previous, image, bounds),
+            None => empty_frame(),
+        },
+        None => {
+            let mut pixels = image.to_vec();
+            Frame::from_rgba(image.width() as u16, image.height() as u16, &mut pixels)
+        },
+    };
+
+    frame.dispose = DisposalMethod::Keep;
+
+    frame
+}
+
+fn map_frame(job: &Job, palette: &Palette, colors: &mut ColorCache) -> Frame<'static> {
+    let image: &RgbaImage = &job.image;
+
+    let (x, y, width, height, pixels): (u32, u32, u32, u32, Cow<[u8]>) = match job.previous {
+        Some(ref previous) => match changed_bounds(previous, image) {
+            Some(bounds) => {
+                let (x, y, width, height) = bounds;
+                (x, y, width, height, Cow::Owned(delta_pixels(previous, image, bounds)))
+            },
+            None => (0, 0, 1, 1, Cow::Owned(vec![0, 0, 0, 0])),
+        },
+        None => (0, 0, image.width(), image.height(), Cow::Borrowed(&**image)),
+    };
+
+    let buffer = pixels.chunks(4)
+        .map(|pixel| colors.index_of(palette, pixel))
+        .collect::<Vec<u8>>();
+
+    let mut frame = Frame::default();
+
+    frame.left = x as u16;
+    frame.top = y as u16;
+    frame.width = width as u16;
+    frame.height = height as u16;
+    frame.buffer = Cow::Owned(buffer);
+    frame.transparent = Some(TRANSPARENT_INDEX);
+    frame.dispose = DisposalMethod::Keep;
+
+    frame
+}
+
+fn changed_bounds(previous: &RgbaImage, image: &RgbaImage) -> Option<(u32, u32, u32, u32)> {
+    let (width, height) = image.dimensions();
+
+    if (width == 0) || (height == 0) {
+        return None;
+    }
+
+    let stride = width as usize * 4;
+
+    let (mut min_x, mut min_y) = (width, height);
+    let (mut max_x, mut max_y) = (0, 0);
+
+    for (y, (row1, row2)) in previous.chunks(stride).zip(image.chunks(stride)).enumerate() {
+        if row1 == row2 {
+            continue;
+        }
+
+        let first = row1.chunks(4).zip(row2.chunks(4)).position(|(a, b)| a != b).unwrap() as u32;
+        let last = row1.chunks(4).zip(row2.chunks(4)).rposition(|(a, b)| a != b).unwrap() as u32;
+
+        min_x = min(min_x, first);
+        max_x = max(max_x, last);
+
+        min_y = min(min_y, y as u32);
+        max_y = y as u32;
+    }
+
+    if min_y > max_y {
+        return None;
+    }
+
+    Some((min_x, min_y, max_x - min_x + 1, max_y - min_y + 1))
+}
+
+fn delta_frame(previous: &RgbaImage, image: &RgbaImage, bounds: (u32, u32, u32, u32)) -> Frame<'static> {
+    let (x, y, width, height) = bounds;
+
+    let mut pixels = delta_pixels(previous, image, bounds);
+    let mut frame = Frame::from_rgba(width as u16, height as u16, &mut pixels);
+
+    frame.left = x as u16;
+    frame.top = y as u16;
+
+    frame
+}
+
+fn delta_pixels(previous: &RgbaImage, image: &RgbaImage, (x, y, width, height): (u32, u32, u32, u32)) -> Vec<u8> {
+    let mut pixels = Vec::with_capacity(width as usize * height as usize * 4);
+
+    for py in y..(y + height) {
+        for px in x..(x + width) {
+            let pixel = image.get_pixel(px, py);
+
+            if (pixel.data[3] == 0) || (previous.get_pixel(px, py) == pixel) {
+                pixels.extend_from_slice(&[0, 0, 0, 0]);
+            } else {
+                pixels.extend_from_slice(&pixel.data);
+            }
+        }
+    }
+
+    pixels
+}
+
+fn empty_frame() -> Frame<'static> {
+    let mut frame = Frame::default();
+
+    frame.width = 1;
+    frame.height = 1;
+    frame.buffer = Cow::Owned(vec![0]);
+    frame.palette = Some(vec![0, 0, 0]);
+    frame.transparent = Some(0);
+
+    frame
+}
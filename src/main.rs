@@ -22,11 +22,15 @@ use cpython::{
 mod ansi;
 mod rect;
 mod drawing;
+mod encoder;
+mod resample;
+mod text;
 mod rasterizer;
 
 use rasterizer::{
     PyImage,
     PyFont,
+    PyGifEncoder,
 };
 
 fn main() {
@@ -64,6 +68,7 @@ fn run(py: Python) -> PyResult<()> {
     // module.add_class::<PyFont>(py)?;
     module.add(py, "Image", py.get_type::<PyImage>())?;
     module.add(py, "Font", py.get_type::<PyFont>())?;
+    module.add(py, "GifEncoder", py.get_type::<PyGifEncoder>())?;
 
     let modules = PyDict::downcast_from(py, sys.get(py, "modules")?)?;
     modules.set_item(py, "rasterizer", module)?;
@@ -1,22 +1,26 @@
 
-use std::cell::RefCell;
+use std::cell::{Cell, RefCell, Ref, RefMut};
 use std::io::{stdout, Write};
 use std::fs::File;
+use std::io;
 use std::io::Read;
+use std::sync::Arc;
 
-use cpython::{PyResult, PyObject};
+use cpython::{PyResult, PyObject, PyBytes, PyErr, Python};
+use cpython::exc::{OSError, ValueError, RuntimeError};
 
 use image::{
     RgbaImage,
     Rgba,
 };
 
-use gif::{Frame, Encoder, Repeat, SetParameter};
-
-use rusttype::{FontCollection, Font, Scale, point};
+use rusttype::{FontCollection, Font, Scale};
 
 use crate::ansi;
 use crate::rect::Rect;
+use crate::encoder::{GifWriter, Palette};
+use crate::resample::ResampleCache;
+use crate::text::TextCache;
 use crate::drawing::{
     clear,
     draw_filled_rect_mut,
@@ -25,32 +29,36 @@ use crate::drawing::{
     draw_line_segment_mut,
     draw_filled_circle_mut,
     draw_filled_ellipse_mut,
+    draw_batch_mut,
+    BATCH_COMMAND_SIZE,
 };
 
 py_class!(pub class PyImage |py| {
-    data img: RefCell<RgbaImage>;
+    data img: RefCell<Arc<RgbaImage>>;
+    data resampled: ResampleCache;
+    data views: Cell<usize>;
 
     def __new__(_cls, width: u32, height: u32, background: (u8, u8, u8, u8) = (0, 0, 0, 255)) -> PyResult<PyImage> {
         // let img = RgbaImage::new(width, height);
         let img = RgbaImage::from_pixel(width, height, Rgba([background.0, background.1, background.2, background.3]));
 
-        PyImage::create_instance(py, RefCell::new(img))
+        PyImage::create_instance(py, RefCell::new(Arc::new(img)), ResampleCache::new(), Cell::new(0))
     }
 
     def size(&self) -> PyResult<(u32, u32)> {
-        let img = self.img(py).borrow();
+        let img = self.pixels(py)?;
 
         Ok(img.dimensions())
     }
 
     def width(&self) -> PyResult<u32> {
-        let img = self.img(py).borrow();
+        let img = self.pixels(py)?;
 
         Ok(img.width())
     }
 
     def height(&self) -> PyResult<u32> {
-        let img = self.img(py).borrow();
+        let img = self.pixels(py)?;
 
         Ok(img.height())
     }
@@ -60,133 +68,257 @@ py_class!(pub class PyImage |py| {
         let img = image::open(&filename).expect(&format!("File not found {:?}", filename));
         let img = img.to_rgba();
 
-        PyImage::create_instance(py, RefCell::new(img))
+        PyImage::create_instance(py, RefCell::new(Arc::new(img)), ResampleCache::new(), Cell::new(0))
+    }
+
+    @staticmethod
+    def from_bytes(width: u32, height: u32, data: PyBytes) -> PyResult<PyImage> {
+        let pixels = data.data(py).to_vec();
+
+        match RgbaImage::from_raw(width, height, pixels) {
+            Some(img) => PyImage::create_instance(py, RefCell::new(Arc::new(img)), ResampleCache::new(), Cell::new(0)),
+            None => Err(PyErr::new::<ValueError, _>(py, format!("Expected {} bytes for {}x{} image", width * height * 4, width, height))),
+        }
     }
 
     def save(&self, filename: String) -> PyResult<PyObject> {
-        let img = self.img(py).borrow();
+        let img = self.pixels(py)?;
+        let img: &RgbaImage = &img;
 
-        // TODO: Improve error handling
-        img.save(&filename).unwrap();
+        py.allow_threads(|| img.save(&filename)).map_err(|err| io_error(py, err))?;
 
         Ok(py.None())
     }
 
-    @staticmethod
-    def save_gif(filename: String, frames: Vec<PyImage>, frame_rate: u16) -> PyResult<PyObject> {
-        println!("Encoding GIF...");
+    // The pixels are only copied once either image is modified
+    def copy(&self) -> PyResult<PyImage> {
+        let img = self.shared_pixels(py)?;
+
+        PyImage::create_instance(py, RefCell::new(img), ResampleCache::new(), Cell::new(0))
+    }
+
+    def copy_from(&self, image: &PyImage) -> PyResult<PyObject> {
+        if (self.img(py) as *const _) == (image.img(py) as *const _) {
+            return Ok(py.None());
+        }
 
-        let first = &frames[0].img(py).borrow();
-        let (w, h) = (first.width() as u16, first.height() as u16);
+        let mut img1 = self.shared_pixels_mut(py)?;
+        let img2 = image.shared_pixels(py)?;
 
-        let mut image = File::create(filename).unwrap();
-        let mut encoder = Encoder::new(&mut image, w, h, &[]).unwrap();
+        if img1.dimensions() != img2.dimensions() {
+            let (w1, h1) = img1.dimensions();
+            let (w2, h2) = img2.dimensions();
+            return Err(PyErr::new::<ValueError, _>(py, format!("Expected {}x{} image, received {}x{}", w1, h1, w2, h2)));
+        }
 
-        encoder.set(Repeat::Infinite).unwrap();
+        // Same as copy, the pixels are shared until either is modified
+        *img1 = img2;
 
-        let delay = 1000 / frame_rate;
+        Ok(py.None())
+    }
 
-        let frame_count = frames.len();
+    // Address and length of the RGBA pixels. Until release_view is called
+    // the pixels can't be modified, or moved by being copied on write, as
+    // the view reads them without borrowing the image.
+    def acquire_view(&self) -> PyResult<(usize, usize)> {
+        let img = self.pixels(py)?;
+        let pixels: &[u8] = &img;
 
-        println!();
+        let views = self.views(py);
+        views.set(views.get() + 1);
 
-        for (i, frame) in (1..).zip(&frames) {
-            ansi::move_up(1);
-            ansi::clear_line();
+        Ok((pixels.as_ptr() as usize, pixels.len()))
+    }
 
-            println!("Writing Frame {}/{} ({:.0}%)",
-                i, frame_count, (i as f32) / (frame_count as f32) * 100.0);
+    def release_view(&self) -> PyResult<PyObject> {
+        let views = self.views(py);
 
-            let _ = stdout().flush();
+        if views.get() == 0 {
+            return Err(PyErr::new::<ValueError, _>(py, "Image has no view to release"));
+        }
 
-            let frame = frame.img(py).borrow();
+        views.set(views.get() - 1);
 
-            let mut pixels = frame.to_vec();
-            let mut frame = Frame::from_rgba(w, h, &mut pixels);
+        Ok(py.None())
+    }
 
-            frame.delay = delay / 10;
+    def to_bytes(&self) -> PyResult<PyBytes> {
+        let img = self.pixels(py)?;
+        let pixels: &[u8] = &img;
 
-            encoder.write_frame(&frame).unwrap();
-        }
+        Ok(PyBytes::new(py, pixels))
+    }
+
+    @staticmethod
+    def save_gif(filename: String, frames: Vec<PyImage>, frame_rate: u16) -> PyResult<PyObject> {
+        println!("Encoding GIF...");
+
+        let frames = frames.iter()
+            .map(|frame| frame.shared_pixels(py))
+            .collect::<PyResult<Vec<_>>>()?;
+
+        let (w, h) = frames[0].dimensions();
+
+        py.allow_threads(|| -> io::Result<()> {
+            let mut writer = GifWriter::create(&filename, w as u16, h as u16, frame_rate, None)?;
+
+            let frame_count = frames.len();
+
+            println!();
+
+            for (i, frame) in (1..).zip(&frames) {
+                ansi::move_up(1);
+                ansi::clear_line();
+
+                println!("Writing Frame {}/{} ({:.0}%)",
+                    i, frame_count, (i as f32) / (frame_count as f32) * 100.0);
+
+                let _ = stdout().flush();
+
+                writer.write_frame(frame.clone())?;
+            }
+
+            writer.finish()
+        }).map_err(|err| io_error(py, err))?;
 
         Ok(py.None())
     }
 
     def clear(&self, fill: (u8, u8, u8, u8)) -> PyResult<PyObject> {
-        let mut img = self.img(py).borrow_mut();
-
-        clear(&mut img, Rgba([fill.0, fill.1, fill.2, fill.3]));
+        let fill = Rgba([fill.0, fill.1, fill.2, fill.3]);
+
+        let mut img = self.shared_pixels_mut(py)?;
+
+        match Arc::get_mut(&mut img) {
+            Some(img) => py.allow_threads(move || clear(img, fill)),
+            // Instead of copying pixels that are about to be overwritten,
+            // leave them to the frames or copies still holding on to them
+            None => {
+                let (width, height) = img.dimensions();
+                *img = Arc::new(py.allow_threads(|| RgbaImage::from_pixel(width, height, fill)));
+            },
+        }
 
         Ok(py.None())
     }
 
     def draw_rect(&self, rect: (i32, i32, u32, u32), fill: (u8, u8, u8, u8)) -> PyResult<PyObject> {
-        let mut img = self.img(py).borrow_mut();
+        let mut img = self.pixels_mut(py)?;
+        let img: &mut RgbaImage = &mut img;
 
-        draw_filled_rect_mut(&mut img, &Rect::new(rect.0, rect.1, rect.2, rect.3), Rgba([fill.0, fill.1, fill.2, fill.3]));
+        py.allow_threads(move || {
+            draw_filled_rect_mut(img, &Rect::new(rect.0, rect.1, rect.2, rect.3), Rgba([fill.0, fill.1, fill.2, fill.3]));
+        });
 
         Ok(py.None())
     }
 
     def draw_image(&self, rect: (i32, i32, u32, u32), image: &PyImage) -> PyResult<PyObject> {
-        let img1 = self.img(py);
-        let img2 = image.img(py);
+        let same = (self.img(py) as *const _) == (image.img(py) as *const _);
 
-        let same = (img1 as *const _) == (img2 as *const _);
+        let rect = Rect::new(rect.0, rect.1, rect.2, rect.3);
 
-        let mut img1 = img1.borrow_mut();
+        let mut img1 = self.pixels_mut(py)?;
+        let img1: &mut RgbaImage = &mut img1;
 
         if same {
-            let img2 = img1.clone();
+            py.allow_threads(move || {
+                let img2 = img1.clone();
 
-            draw_image_mut(&mut img1, &Rect::new(rect.0, rect.1, rect.2, rect.3), &img2);
+                draw_image_mut(img1, &rect, &img2, &ResampleCache::new());
+            });
         } else {
-            let img2 = img2.borrow();
+            let img2 = image.pixels(py)?;
+            let img2: &RgbaImage = &img2;
+
+            let cache: &ResampleCache = image.resampled(py);
 
-            draw_image_mut(&mut img1, &Rect::new(rect.0, rect.1, rect.2, rect.3), &img2);
+            py.allow_threads(move || {
+                draw_image_mut(img1, &rect, img2, cache);
+            });
         }
 
         Ok(py.None())
     }
 
+    def draw_batch(&self, commands: PyBytes) -> PyResult<PyObject> {
+        let data = commands.data(py);
+
+        if (data.len() % (BATCH_COMMAND_SIZE * 8)) != 0 {
+            return Err(PyErr::new::<ValueError, _>(py, format!("Expected commands of {} doubles, received {} bytes", BATCH_COMMAND_SIZE, data.len())));
+        }
+
+        let mut img = self.pixels_mut(py)?;
+        let img: &mut RgbaImage = &mut img;
+
+        py.allow_threads(move || {
+            let commands: Vec<f64> = data.chunks(8)
+                .map(|chunk| {
+                    let mut bytes = [0; 8];
+                    bytes.copy_from_slice(chunk);
+                    f64::from_bits(u64::from_ne_bytes(bytes))
+                })
+                .collect();
+
+            draw_batch_mut(img, &commands)
+        }).map_err(|opcode| PyErr::new::<ValueError, _>(py, format!("Unknown draw command {}", opcode)))?;
+
+        Ok(py.None())
+    }
+
     def draw_text(&self, top_left: (i32, i32), text: &str, font: &PyFont, size: f32, fill: (u8, u8, u8, u8)) -> PyResult<PyObject> {
-        let mut img = self.img(py).borrow_mut();
+        let mut img = self.pixels_mut(py)?;
+        let img: &mut RgbaImage = &mut img;
+
+        let cache: &TextCache = font.text(py);
 
-        let font = font.font(py).borrow();
+        let font: &Font = font.font(py);
         let scale = Scale::uniform(size);
 
-        draw_text_mut(&mut img, top_left, text, &font, scale, Rgba([fill.0, fill.1, fill.2, fill.3]));
+        py.allow_threads(move || {
+            draw_text_mut(img, top_left, text, font, scale, Rgba([fill.0, fill.1, fill.2, fill.3]), cache);
+        });
 
         Ok(py.None())
     }
 
     def draw_line(&self, start: (i32, i32), end: (i32, i32), color: (u8, u8, u8, u8)) -> PyResult<PyObject> {
-        let mut img = self.img(py).borrow_mut();
+        let mut img = self.pixels_mut(py)?;
+        let img: &mut RgbaImage = &mut img;
 
-        draw_line_segment_mut(&mut img, start, end, Rgba([color.0, color.1, color.2, color.3]));
+        py.allow_threads(move || {
+            draw_line_segment_mut(img, start, end, Rgba([color.0, color.1, color.2, color.3]));
+        });
 
         Ok(py.None())
     }
 
     def draw_circle(&self, center: (i32, i32), radius: u32, fill: (u8, u8, u8, u8)) -> PyResult<PyObject> {
-        let mut img = self.img(py).borrow_mut();
+        let mut img = self.pixels_mut(py)?;
+        let img: &mut RgbaImage = &mut img;
 
-        draw_filled_circle_mut(&mut img, center, radius, Rgba([fill.0, fill.1, fill.2, fill.3]));
+        py.allow_threads(move || {
+            draw_filled_circle_mut(img, center, radius, Rgba([fill.0, fill.1, fill.2, fill.3]));
+        });
 
         Ok(py.None())
     }
 
     def draw_ellipse(&self, center: (i32, i32), radius: (u32, u32), fill: (u8, u8, u8, u8)) -> PyResult<PyObject> {
-        let mut img = self.img(py).borrow_mut();
+        let mut img = self.pixels_mut(py)?;
+        let img: &mut RgbaImage = &mut img;
 
-        draw_filled_ellipse_mut(&mut img, center, radius, Rgba([fill.0, fill.1, fill.2, fill.3]));
+        py.allow_threads(move || {
+            draw_filled_ellipse_mut(img, center, radius, Rgba([fill.0, fill.1, fill.2, fill.3]));
+        });
 
         Ok(py.None())
     }
 });
 
 py_class!(pub class PyFont |py| {
-    data font: RefCell<Font<'static>>;
+    data font: Font<'static>;
+    data text: TextCache;
 
     @staticmethod
     def load(filename: String) -> PyResult<PyFont> {
@@ -197,32 +329,30 @@ py_class!(pub class PyFont |py| {
 
         let font = FontCollection::from_bytes(data).unwrap().into_font().unwrap();
 
-        PyFont::create_instance(py, RefCell::new(font))
+        PyFont::create_instance(py, font, TextCache::new())
     }
 
     def measure_line(&self, text: &str, size: f32) -> PyResult<(u32, u32)> {
-        let font = self.font(py).borrow();
+        let font = self.font(py);
         let scale = Scale::uniform(size);
 
-        let v_metrics = font.v_metrics(scale);
-        let glyphs: Vec<_> = font
-            .layout(text, scale, point(0.0, v_metrics.ascent))
-            .collect();
+        let layout = self.text(py).layout(font, text, scale);
+        let glyphs = &layout.glyphs;
 
         if glyphs.is_empty() {
             return Ok((0, 0));
         }
 
-        let glyphs_height = (v_metrics.ascent - v_metrics.descent).ceil() as u32;
+        let glyphs_height = (layout.ascent - layout.descent).ceil() as u32;
 
         let glyphs_width = {
             let min_x = glyphs
                 .first()
-                .map(|g| g.pixel_bounding_box().unwrap().min.x)
+                .map(|g| g.bounding_box.unwrap().min.x)
                 .unwrap();
             let max_x = glyphs
                 .last()
-                .map(|g| g.pixel_bounding_box().unwrap().max.x)
+                .map(|g| g.bounding_box.unwrap().max.x)
                 .unwrap();
             (max_x - min_x) as u32
         };
@@ -230,3 +360,156 @@ py_class!(pub class PyFont |py| {
         Ok((glyphs_width, glyphs_height))
     }
 });
+
+py_class!(pub class PyGifEncoder |py| {
+    data writer: RefCell<Option<GifWriter>>;
+    data progress: Option<PyObject>;
+    data reported: Cell<usize>;
+
+    // Given progress, it is called with the number of frames written
+    // each time more frames have been written to the file
+    def __new__(_cls, filename: String, width: u32, height: u32, frame_rate: u16, samples: Option<Vec<PyImage>> = None, progress: Option<PyObject> = None) -> PyResult<PyGifEncoder> {
+        // Given sample frames, every frame is mapped to one global palette
+        // built from them, instead of being quantized on its own
+        let palette = match samples {
+            Some(samples) => {
+                let samples = samples.iter()
+                    .map(|sample| sample.pixels(py))
+                    .collect::<PyResult<Vec<_>>>()?;
+                let samples: Vec<&RgbaImage> = samples.iter().map(|sample| &**sample).collect();
+
+                Some(py.allow_threads(|| Palette::from_samples(&samples)))
+            },
+            None => None,
+        };
+
+        let writer = GifWriter::create(&filename, width as u16, height as u16, frame_rate, palette)
+            .map_err(|err| io_error(py, err))?;
+
+        PyGifEncoder::create_instance(py, RefCell::new(Some(writer)), progress, Cell::new(0))
+    }
+
+    def write_frame(&self, image: &PyImage) -> PyResult<PyObject> {
+        let written = {
+            let mut writer = self.writer(py).try_borrow_mut().map_err(|_| busy_error(py, "GIF encoder"))?;
+
+            let writer = match writer.as_mut() {
+                Some(writer) => writer,
+                None => return Err(PyErr::new::<ValueError, _>(py, "GIF encoder is already finished")),
+            };
+
+            // The encoder shares the pixels instead of copying them, they're
+            // only copied if the image is drawn to while still being encoded
+            let img = image.shared_pixels(py)?;
+
+            py.allow_threads(move || -> io::Result<usize> {
+                writer.write_frame(img)?;
+                Ok(writer.written_frames())
+            }).map_err(|err| io_error(py, err))?
+        };
+
+        self.report(py, written)?;
+
+        Ok(py.None())
+    }
+
+    def repeat_frame(&self) -> PyResult<PyObject> {
+        let mut writer = self.writer(py).try_borrow_mut().map_err(|_| busy_error(py, "GIF encoder"))?;
+
+        match writer.as_mut() {
+            Some(writer) => writer.repeat_frame(),
+            None => return Err(PyErr::new::<ValueError, _>(py, "GIF encoder is already finished")),
+        }
+
+        Ok(py.None())
+    }
+
+    def finish(&self) -> PyResult<PyObject> {
+        let writer = self.writer(py).try_borrow_mut().map_err(|_| busy_error(py, "GIF encoder"))?.take();
+
+        // Dropping the encoder writes the GIF trailer
+        if let Some(mut writer) = writer {
+            // The last frames are still being quantized, so they're
+            // waited for one at a time to keep reporting progress
+            loop {
+                let (more, written) = py.allow_threads(|| -> io::Result<(bool, usize)> {
+                    let more = writer.flush_frame()?;
+                    Ok((more, writer.written_frames()))
+                }).map_err(|err| io_error(py, err))?;
+
+                if !more {
+                    break;
+                }
+
+                self.report(py, written)?;
+            }
+
+            py.allow_threads(move || writer.finish()).map_err(|err| io_error(py, err))?;
+        }
+
+        Ok(py.None())
+    }
+});
+
+impl PyImage {
+    // The pixels are worked on with the GIL released, so another thread
+    // can reach the same image while it is borrowed. Raise instead of
+    // panicking when that happens.
+    fn pixels<'a>(&'a self, py: Python<'a>) -> PyResult<Ref<'a, RgbaImage>> {
+        let img = self.img(py).try_borrow().map_err(|_| busy_error(py, "Image"))?;
+
+        Ok(Ref::map(img, |img| &**img))
+    }
+
+    // Pixels shared with copies or frames being encoded are copied on write
+    fn pixels_mut<'a>(&'a self, py: Python<'a>) -> PyResult<RefMut<'a, RgbaImage>> {
+        let img = self.shared_pixels_mut(py)?;
+
+        Ok(RefMut::map(img, Arc::make_mut))
+    }
+
+    fn shared_pixels(&self, py: Python) -> PyResult<Arc<RgbaImage>> {
+        let img = self.img(py).try_borrow().map_err(|_| busy_error(py, "Image"))?;
+
+        Ok(img.clone())
+    }
+
+    fn shared_pixels_mut<'a>(&'a self, py: Python<'a>) -> PyResult<RefMut<'a, Arc<RgbaImage>>> {
+        if self.views(py).get() > 0 {
+            return Err(PyErr::new::<RuntimeError, _>(py, "Image is viewed and cannot be modified"));
+        }
+
+        let img = self.img(py).try_borrow_mut().map_err(|_| busy_error(py, "Image"))?;
+
+        // Resized copies are stale once the pixels change
+        self.resampled(py).clear();
+
+        Ok(img)
+    }
+}
+
+impl PyGifEncoder {
+    fn report(&self, py: Python, written: usize) -> PyResult<()> {
+        let reported = self.reported(py);
+
+        if written == reported.get() {
+            return Ok(());
+        }
+
+        reported.set(written);
+
+        if let Some(progress) = self.progress(py) {
+            progress.call(py, (written,), None)?;
+        }
+
+        Ok(())
+    }
+}
+
+fn busy_error(py: Python, name: &str) -> PyErr {
+    PyErr::new::<RuntimeError, _>(py, format!("{} is in use by another thread", name))
+}
+
+fn io_error(py: Python, err: io::Error) -> PyErr {
+    PyErr::new::<OSError, _>(py, err.to_string())
+}
@@ -0,0 +1,263 @@
+use std::sync::{Arc, Mutex, MutexGuard, PoisonError};
+use std::sync::atomic::{AtomicUsize, Ordering};
+
+use image::{RgbaImage, imageops::{resize, FilterType}};
+
+// Memory allowed for the resized copies of all images together
+const RESAMPLE_BUDGET: usize = 64 * 1024 * 1024;
+
+// Number of recently missed sizes remembered per image
+const MISS_LIMIT: usize = 8;
+
+// Resized copies of every image, shared such that the budget applies
+// to all of them, instead of to each image separately
+static ENTRIES: Mutex<Entries> = Mutex::new(Entries { entries: Vec::new(), bytes: 0 });
+
+static NEXT_ID: AtomicUsize = AtomicUsize::new(0);
+
+struct Entry {
+    id: usize,
+    width: u32,
+    height: u32,
+    filter: u8,
+    image: Arc<RgbaImage>,
+}
+
+// Least recently used first
+struct Entries {
+    entries: Vec<Entry>,
+    bytes: usize,
+}
+
+struct Miss {
+    width: u32,
+    height: u32,
+    filter: u8,
+    count: u32,
+}
+
+// Sizes recently drawn without being cached, least recently missed first
+struct Misses {
+    misses: Vec<Miss>,
+}
+
+// The same image can be drawn by several threads at once, which wait
+// for each other, such that a size is only resized once
+pub struct ResampleCache {
+    id: usize,
+    misses: Mutex<Misses>,
+}
+
+impl ResampleCache {
+    pub fn new() -> ResampleCache {
+        ResampleCache {
+            id: NEXT_ID.fetch_add(1, Ordering::Relaxed),
+            misses: Mutex::new(Misses { misses: Vec::new() }),
+        }
+    }
+
+    // A size is only cached the second time it's missed, as a size that
+    // keeps changing between draws isn't worth the memory
+    pub fn resized(&self, image: &RgbaImage, width: u32, height: u32, filter: FilterType) -> Arc<RgbaImage> {
+        let mut misses = lock(&self.misses);
+
+        if let Some(resized) = lock(&ENTRIES).get(self.id, width, height, filter) {
+            return resized;
+        }
+
+        let resized = Arc::new(resize(image, width, height, filter));
+
+        if misses.missed(width, height, filter) {
+            lock(&ENTRIES).insert(self.id, width, height, filter, resized.clone(), RESAMPLE_BUDGET);
+        }
+
+        resized
+    }
+
+    pub fn clear(&self) {
+        let mut misses = lock(&self.misses);
+
+        lock(&ENTRIES).remove(self.id);
+        misses.misses.clear();
+    }
+
+    #[cfg(test)]
+    fn is_cached(&self, width: u32, height: u32, filter: FilterType) -> bool {
+        lock(&ENTRIES).get(self.id, width, height, filter).is_some()
+    }
+}
+
+impl Drop for ResampleCache {
+    fn drop(&mut self) {
+        lock(&ENTRIES).remove(self.id);
+    }
+}
+
+impl Entries {
+    fn get(&mut self, id: usize, width: u32, height: u32, filter: FilterType) -> Option<Arc<RgbaImage>> {
+        let filter = filter_id(filter);
+
+        let i = self.entries.iter().position(|entry| {
+            (entry.id == id) && (entry.width == width) && (entry.height == height) && (entry.filter == filter)
+        })?;
+
+        let entry = self.entries.remove(i);
+        let image = entry.image.clone();
+        self.entries.push(entry);
+
+        Some(image)
+    }
+
+    fn insert(&mut self, id: usize, width: u32, height: u32, filter: FilterType, image: Arc<RgbaImage>, budget: usize) {
+        let size = image_bytes(&image);
+
+        if size > budget {
+            return;
+        }
+
+        while (self.bytes + size) > budget {
+            let entry = self.entries.remove(0);
+            self.bytes -= image_bytes(&entry.image);
+        }
+
+        self.bytes += size;
+        self.entries.push(Entry { id, width, height, filter: filter_id(filter), image });
+    }
+
+    fn remove(&mut self, id: usize) {
+        let mut bytes = self.bytes;
+
+        self.entries.retain(|entry| {
+            if entry.id == id {
+                bytes -= image_bytes(&entry.image);
+            }
+
+            entry.id != id
+        });
+
+        self.bytes = bytes;
+    }
+}
+
+impl Misses {
+    // Returns true when the size was missed before and should be cached
+    fn missed(&mut self, width: u32, height: u32, filter: FilterType) -> bool {
+        let filter = filter_id(filter);
+
+        let i = self.misses.iter().position(|miss| {
+            (miss.width == width) && (miss.height == height) && (miss.filter == filter)
+        });
+
+        let mut miss = match i {
+            Some(i) => self.misses.remove(i),
+            None => Miss { width, height, filter, count: 0 },
+        };
+
+        miss.count += 1;
+
+        if miss.count >= 2 {
+            return true;
+        }
+
+        if self.misses.len() >= MISS_LIMIT {
+            self.misses.remove(0);
+        }
+
+        self.misses.push(miss);
+
+        false
+    }
+}
+
+// The caches are only modified through whole operations, so they
+// are still usable after a thread panicked while holding the lock
+fn lock<T>(mutex: &Mutex<T>) -> MutexGuard<'_, T> {
+    mutex.lock().unwrap_or_else(PoisonError::into_inner)
+}
+
+fn image_bytes(image: &RgbaImage) -> usize {
+    image.width() as usize * image.height() as usize * 4
+}
+
+fn filter_id(filter: FilterType) -> u8 {
+    match filter {
+        FilterType::Nearest => 0,
+        FilterType::Triangle => 1,
+        FilterType::CatmullRom => 2,
+        FilterType::Gaussian => 3,
+        FilterType::Lanczos3 => 4,
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use image::Rgba;
+
+    use super::*;
+
+    use crate::rect::Rect;
+    use crate::drawing::{draw_image_at, draw_image_mut};
+
+    fn source() -> RgbaImage {
+        RgbaImage::from_fn(40, 30, |x, y| {
+            Rgba([(x * 6) as u8, (y * 8) as u8, ((x * y) % 256) as u8, 255])
+        })
+    }
+
+    fn draw(source: &RgbaImage, width: u32, height: u32, cache: &ResampleCache) -> RgbaImage {
+        let mut image = RgbaImage::new(50, 40);
+        draw_image_mut(&mut image, &Rect::new(2, 3, width, height), source, cache);
+        image
+    }
+
+    #[test]
+    fn caches_every_size_drawn_repeatedly() {
+        let source = source();
+        let cache = ResampleCache::new();
+
+        let sizes = [(10, 8), (20, 15), (33, 25), (45, 36)];
+
+        for frame in 0..4 {
+            for &(width, height) in sizes.iter() {
+                let mut expected = RgbaImage::new(50, 40);
+                draw_image_at(&mut expected, (2, 3), &resize(&source, width, height, FilterType::Triangle));
+
+                // Misses are drawn the same as cached sizes
+                let actual = draw(&source, width, height, &cache);
+                assert!(actual == expected, "frame {} size {}x{}", frame, width, height);
+
+                assert_eq!(cache.is_cached(width, height, FilterType::Triangle), frame > 0);
+            }
+        }
+
+        cache.clear();
+
+        for &(width, height) in sizes.iter() {
+            assert!(!cache.is_cached(width, height, FilterType::Triangle));
+        }
+    }
+
+    #[test]
+    fn budget_evicts_least_recently_used() {
+        let image = Arc::new(RgbaImage::new(4, 4));
+        let size = image_bytes(&image);
+
+        let mut entries = Entries { entries: Vec::new(), bytes: 0 };
+
+        entries.insert(0, 4, 4, FilterType::Triangle, image.clone(), size * 2);
+        entries.insert(1, 4, 4, FilterType::Triangle, image.clone(), size * 2);
+        assert!(entries.get(0, 4, 4, FilterType::Triangle).is_some());
+
+        // Budget is shared between images, so inserting for another
+        // image evicts the least recently used one
+        entries.insert(2, 4, 4, FilterType::Triangle, image.clone(), size * 2);
+
+        assert!(entries.get(0, 4, 4, FilterType::Triangle).is_some());
+        assert!(entries.get(1, 4, 4, FilterType::Triangle).is_none());
+        assert!(entries.get(2, 4, 4, FilterType::Triangle).is_some());
+        assert_eq!(entries.bytes, size * 2);
+
+        entries.remove(0);
+        assert_eq!(entries.bytes, size);
+    }
+}
@@ -0,0 +1,132 @@
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex, MutexGuard, PoisonError};
+
+use rusttype::{Font, GlyphId, Scale, Point, Rect, point};
+
+// Caches are simply emptied once they grow past these
+const LAYOUT_LIMIT: usize = 1024;
+const COVERAGE_LIMIT: usize = 4096;
+
+pub struct LayoutGlyph {
+    pub id: GlyphId,
+    pub position: Point<f32>,
+    pub bounding_box: Option<Rect<i32>>,
+}
+
+pub struct Layout {
+    pub ascent: f32,
+    pub descent: f32,
+    pub glyphs: Vec<LayoutGlyph>,
+}
+
+pub struct Coverage {
+    pub width: u32,
+    pub height: u32,
+    pub values: Vec<f32>,
+}
+
+type LayoutKey = (String, u32, u32);
+
+// Rasterizing only depends on the glyph, the scale and where the glyph
+// lands relative to its pixel bounding box, so glyphs repeated within a
+// text or across frames share the same coverage
+type CoverageKey = (u32, u32, u32, u32, u32, i32, i32);
+
+// Fonts are shared by every thread, so the maps are only locked while
+// looking up or inserting, and glyphs are laid out and rasterized unlocked
+pub struct TextCache {
+    layouts: Mutex<HashMap<LayoutKey, Arc<Layout>>>,
+    coverages: Mutex<HashMap<CoverageKey, Arc<Coverage>>>,
+}
+
+impl TextCache {
+    pub fn new() -> TextCache {
+        TextCache {
+            layouts: Mutex::new(HashMap::new()),
+            coverages: Mutex::new(HashMap::new()),
+        }
+    }
+
+    pub fn layout(&self, font: &Font, text: &str, scale: Scale) -> Arc<Layout> {
+        let key = (text.to_owned(), scale.x.to_bits(), scale.y.to_bits());
+
+        if let Some(layout) = lock(&self.layouts).get(&key) {
+            return layout.clone();
+        }
+
+        let v_metrics = font.v_metrics(scale);
+
+        let glyphs = font
+            .layout(text, scale, point(0.0, v_metrics.ascent))
+            .map(|glyph| LayoutGlyph {
+                id: glyph.id(),
+                position: glyph.position(),
+                bounding_box: glyph.pixel_bounding_box(),
+            })
+            .collect();
+
+        let layout = Arc::new(Layout {
+            ascent: v_metrics.ascent,
+            descent: v_metrics.descent,
+            glyphs,
+        });
+
+        let mut layouts = lock(&self.layouts);
+
+        if layouts.len() >= LAYOUT_LIMIT {
+            layouts.clear();
+        }
+
+        layouts.insert(key, layout.clone());
+
+        layout
+    }
+
+    pub fn coverage(&self, font: &Font, glyph: &LayoutGlyph, scale: Scale) -> Option<Arc<Coverage>> {
+        let bounding_box = glyph.bounding_box?;
+
+        let position = glyph.position;
+        let (floor_x, floor_y) = (position.x.floor(), position.y.floor());
+
+        let key = (
+            glyph.id.0,
+            scale.x.to_bits(), scale.y.to_bits(),
+            (position.x - floor_x).to_bits(), (position.y - floor_y).to_bits(),
+            bounding_box.min.x - floor_x as i32, bounding_box.min.y - floor_y as i32,
+        );
+
+        if let Some(coverage) = lock(&self.coverages).get(&key) {
+            return Some(coverage.clone());
+        }
+
+        let width = bounding_box.width() as u32;
+        let height = bounding_box.height() as u32;
+
+        let mut values = vec![0.0; width as usize * height as usize];
+
+        font.glyph(glyph.id)
+            .scaled(scale)
+            .positioned(position)
+            .draw(|x, y, v| {
+                values[(y * width + x) as usize] = v;
+            });
+
+        let coverage = Arc::new(Coverage { width, height, values });
+
+        let mut coverages = lock(&self.coverages);
+
+        if coverages.len() >= COVERAGE_LIMIT {
+            coverages.clear();
+        }
+
+        coverages.insert(key, coverage.clone());
+
+        Some(coverage)
+    }
+}
+
+// Inserting or clearing can't leave a map half updated, so a thread
+// panicking while holding the lock doesn't make the cache unusable
+fn lock<T>(mutex: &Mutex<T>) -> MutexGuard<'_, T> {
+    mutex.lock().unwrap_or_else(PoisonError::into_inner)
+}
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from random import Random
+from textwrap import dedent
+from unittest import TestCase
+
+from textmation.parser import parse
+from textmation.scenebuilder import SceneBuilder
+from textmation.elements import Keyframe
+from textmation.datatypes import Number, Time, TimeUnit
+
+
+_source = dedent("""\
+create Rectangle
+	create Animation
+		create Keyframe
+			time = 0.5s
+			x = 0
+		create Keyframe
+			time = 1s
+			x = 10
+		create Keyframe
+			time = 1s
+			y = 10
+		create Keyframe
+			time = 2s
+			x = 20
+		create Keyframe
+			time = 3.5s
+			x = 30
+""")
+
+_keyframe_times = [0.5, 1, 1, 2, 3.5]
+
+
+def build_animation():
+	scene = SceneBuilder().build(parse(_source))
+	return scene.elements[0].children[0]
+
+
+# Linear search over every keyframe
+def get_between(animation, time):
+	first = animation.keyframes[0]
+	if time < first.time.seconds:
+		return first, first
+
+	last = animation.keyframes[-1]
+	if time >= last.time.seconds:
+		return last, last
+
+	for before, after in zip(animation.keyframes, animation.keyframes[1:]):
+		if time < after.time.seconds:
+			return before, after
+
+
+class GetBetweenTest(TestCase):
+	def assertBetween(self, animation, times):
+		for time in times:
+			with self.subTest(time=time):
+				expected = get_between(animation, time)
+				actual = animation.get_between(time)
+				self.assertIs(actual[0], expected[0])
+				self.assertIs(actual[1], expected[1])
+
+	def test_keyframe_times(self):
+		self.assertEqual(build_animation().keyframe_times, _keyframe_times)
+
+	def test_forward(self):
+		self.assertBetween(build_animation(), [i * 0.05 for i in range(100)])
+
+	def test_backward(self):
+		self.assertBetween(build_animation(), [i * 0.05 for i in reversed(range(100))])
+
+	def test_seek(self):
+		times = [i * 0.05 for i in range(100)]
+		Random(0).shuffle(times)
+		self.assertBetween(build_animation(), times)
+
+	def test_boundaries(self):
+		animation = build_animation()
+
+		self.assertBetween(animation, _keyframe_times)
+		self.assertBetween(animation, reversed(_keyframe_times))
+
+		for time in _keyframe_times:
+			self.assertBetween(build_animation(), [time])
+
+	def test_outside(self):
+		animation = build_animation()
+		first, last = animation.keyframes[0], animation.keyframes[-1]
+
+		for time in (-1, 0, 0.49, 3.5, 4, 100, 0, 100, -1):
+			with self.subTest(time=time):
+				expected = (first, first) if time < 0.5 else (last, last)
+				self.assertEqual(animation.get_between(time), expected)
+
+	def test_add_keyframe(self):
+		animation = build_animation()
+		self.assertBetween(animation, [3, 4])
+
+		keyframe = Keyframe()
+		animation.add(keyframe)
+		keyframe.on_ready()
+		keyframe.set("time", Time(5, TimeUnit.Seconds))
+		keyframe.define("x", Number(40))
+
+		self.assertEqual(animation.keyframe_times, _keyframe_times + [5])
+		self.assertBetween(animation, [4, 5, 6, 3])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+
+from textmation.datatypes import Number, Vec2, Vec3, Vec4, BinOp, UnaryOp, Call
+from textmation.elements.element import ElementProperty, Percentage
+from textmation.elements.compiler import compile_value
+from textmation.functions import functions
+
+
+class CompilerTest(TestCase):
+	def assertCompiled(self, value):
+		compiled = compile_value(value)
+		self.assertIsNotNone(compiled)
+
+		expected = value.eval()
+		actual = compiled()
+
+		self.assertIs(actual.type, expected.type)
+		self.assertEqual(actual.unbox(), expected.unbox())
+
+	def test_operators(self):
+		values = Number(7), Number(-2.5), Vec2(3, -4), Vec3(1, 2, 3), Vec4(5, 6, 7, 8)
+		numbers = Number(7), Number(-2.5), Number(3)
+
+		for op in ("+", "-", "*", "/"):
+			for lhs in values:
+				for rhs in values:
+					value = BinOp(op, lhs, rhs)
+					with self.subTest(value=value):
+						try:
+							value.eval()
+						except ZeroDivisionError:
+							# Smaller vectors are padded with zeros
+							continue
+						self.assertCompiled(value)
+
+		for op in ("//", "%"):
+			for lhs in numbers:
+				for rhs in numbers:
+					value = BinOp(op, lhs, rhs)
+					with self.subTest(value=value):
+						self.assertCompiled(value)
+
+	def test_nested(self):
+		a = ElementProperty("a", Number(10))
+		b = ElementProperty("b", Vec2(1, 2))
+
+		for value in (
+			BinOp("+", BinOp("*", a, Number(2)), BinOp("//", a, Number(3))),
+			BinOp("-", BinOp("*", b, a), Vec4(1, 1, 1, 1)),
+			BinOp("/", BinOp("+", Vec3(1, 2, 3), b), BinOp("-", a, Number(5))),
+		):
+			with self.subTest(value=value):
+				self.assertCompiled(value)
+
+	def test_reference(self):
+		for value in (Number(4), Vec2(1, 2), Vec3(1, 2, 3), Vec4(1, 2, 3, 4)):
+			with self.subTest(value=value):
+				self.assertCompiled(ElementProperty("a", value))
+
+	def test_reference_is_read_on_every_call(self):
+		a = ElementProperty("a", Number(1))
+		compiled = compile_value(BinOp("+", a, Number(1)))
+		self.assertEqual(compiled().value, 2)
+
+		a.cached = Number(5)
+		self.assertEqual(compiled().value, 6)
+
+	def test_percentage(self):
+		width = ElementProperty("width", Number(300))
+
+		for percentage in (0, 25, 50, 100, 150, 33.3):
+			value = Percentage(percentage)
+			value.apply(width)
+			with self.subTest(percentage=percentage):
+				self.assertCompiled(value)
+				self.assertCompiled(BinOp("+", value, Number(10)))
+
+	def test_percentage_without_number(self):
+		value = Percentage(50)
+		value.apply(ElementProperty("position", Vec2(10, 20)))
+		self.assertIsNone(compile_value(value))
+
+	def test_unary(self):
+		a = ElementProperty("a", Number(3))
+
+		for value in (Number(7), Number(-2.5), Vec2(3, -4), Vec3(1, 2, 3), Vec4(5, 6, 7, 8), a, BinOp("*", a, Vec2(1, 2))):
+			with self.subTest(value=value):
+				self.assertCompiled(UnaryOp("-", value))
+
+	def test_call(self):
+		a = ElementProperty("a", Number(2.5))
+
+		for value in (
+			Call(functions["min"], (a, Number(1))),
+			Call(functions["max"], (a, BinOp("*", a, Number(2)))),
+			Call(functions["floor"], (a,)),
+			Call(functions["ceil"], (UnaryOp("-", a),)),
+			Call(functions["round"], (BinOp("/", Number(7), a),)),
+			BinOp("*", Vec2(1, 2), Call(functions["mod"], (Number(7), a))),
+			Call(functions["rgb"], (a, Number(0), BinOp("*", a, Number(10)))),
+		):
+			with self.subTest(value=value):
+				self.assertCompiled(value)
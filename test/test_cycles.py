@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from random import Random
+from textwrap import dedent
+from unittest import TestCase
+
+from textmation.parser import parse
+from textmation.scenebuilder import SceneBuilder, SceneBuilderError
+from textmation.elements.element import ElementProperty, CircularReferenceError, has_cycle, find_cycles
+from textmation.datatypes import Number, BinOp
+
+
+def build(string):
+	return SceneBuilder().build(parse(dedent(string)))
+
+
+class CycleTest(TestCase):
+	def assertCycle(self, element, name, value, paths):
+		with self.assertRaises(CircularReferenceError) as context:
+			element.set(name, value)
+
+		property = element.get(name)
+		self.assertTrue(has_cycle(property))
+		self.assertEqual(context.exception.paths, paths)
+
+	def test_self_reference(self):
+		scene = build("""\
+		create Rectangle
+			width = 10
+		""")
+
+		rect = scene.elements[0]
+		width = rect.get("width")
+
+		self.assertCycle(rect, "width", width, [(width, width)])
+
+	def test_self_reference_expression(self):
+		scene = build("""\
+		create Rectangle
+			width = 10
+		""")
+
+		rect = scene.elements[0]
+		width = rect.get("width")
+
+		self.assertCycle(rect, "width", BinOp("+", width, Number(1)), [(width, width)])
+
+	def test_parent(self):
+		scene = build("""\
+		create Rectangle
+			width = 10
+			create Rectangle
+				width = parent.width * 2
+		""")
+
+		rect = scene.elements[0]
+		child = rect.elements[0]
+		width, child_width = rect.get("width"), child.get("width")
+
+		self.assertCycle(rect, "width", BinOp("-", child_width, Number(1)), [(width, child_width, width)])
+
+	def test_multiple_paths(self):
+		scene = build("""\
+		create Rectangle
+			width = 10
+			height = width
+			create Rectangle
+				width = parent.width
+		""")
+
+		rect = scene.elements[0]
+		width, height, child_width = rect.get("width"), rect.get("height"), rect.elements[0].get("width")
+
+		self.assertCycle(rect, "width", BinOp("+", height, child_width), [(width, height, width), (width, child_width, width)])
+
+	def test_diamond(self):
+		scene = build("""\
+		a := 1
+		b := a + 1
+		c := a * 2
+		d := b + c
+
+		create Rectangle
+			width = d + a
+			height = width + d
+		""")
+
+		rect = scene.elements[0]
+
+		for name in ("width", "height"):
+			with self.subTest(name=name):
+				property = rect.get(name)
+				self.assertFalse(has_cycle(property))
+				self.assertEqual(find_cycles(property), [])
+
+		self.assertEqual(rect.eval("height").value, 9)
+
+	def test_error_message(self):
+		with self.assertRaises(SceneBuilderError) as context:
+			build("""\
+			create Rectangle
+				width = 10
+				height = width
+				width = height + 1
+			""")
+
+		self.assertIn("width -> height -> width", str(context.exception))
+
+	def test_has_cycle_matches_find_cycles(self):
+		random = Random(0)
+
+		for i in range(200):
+			properties = [ElementProperty(f"p{j}", Number(j)) for j in range(6)]
+
+			values = []
+			for property in properties:
+				value = Number(1)
+				for _ in range(random.randint(0, 3)):
+					value = BinOp("+", value, random.choice(properties))
+				values.append(value)
+
+			# Assigned directly, as set raises for cycles
+			for property, value in zip(properties, values):
+				property.value = value
+
+			for property in properties:
+				with self.subTest(graph=i, property=property.name):
+					self.assertEqual(has_cycle(property), len(find_cycles(property)) > 0)
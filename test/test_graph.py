@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from textwrap import dedent
+from unittest import TestCase
+
+from textmation.parser import parse
+from textmation.datatypes import Angle, Time
+from textmation.scenebuilder import SceneBuilder
+from textmation.elements import Element, Rectangle, Keyframe
+from textmation.renderer import Renderer
+
+
+def build(string):
+	return SceneBuilder().build(parse(dedent(string)))
+
+
+def computed_values(scene):
+	values = []
+	for i, element in enumerate(scene.traverse()):
+		if isinstance(element, Keyframe):
+			continue
+		for name, property in element.properties.items():
+			if property.readonly:
+				continue
+			value = element.get_computed(name).unbox()
+			# Angle and Time don't implement __eq__
+			if isinstance(value, (Angle, Time)):
+				value = repr(value)
+			values.append((i, element.__class__.__name__, name, value))
+	return values
+
+
+class PropertyGraphTest(TestCase):
+	def assertMatchesUncached(self, string, times=(0,)):
+		cached, uncached = build(string), build(string)
+
+		for time in times:
+			with self.subTest(time=time):
+				cached.compute(time)
+				# Element.compute evaluates every property recursively
+				Element.compute(uncached, time)
+
+				self.assertEqual(computed_values(cached), computed_values(uncached))
+
+	def test_references(self):
+		self.assertMatchesUncached("""\
+		a := 10
+		b := a * 2
+		c := b + a
+
+		create Rectangle
+			width = c
+			height = c - b
+			create Rectangle
+				width = parent.width / 2
+				height = parent.height + parent.width
+		""")
+
+	def test_percentages(self):
+		self.assertMatchesUncached("""\
+		width = 400
+		height = 300
+
+		create Rectangle
+			width = 50%
+			height = 25%
+			create Rectangle
+				x = 10%
+				y = 20%
+				width = 50%
+				height = 50%
+		""")
+
+	def test_animation(self):
+		self.assertMatchesUncached("""\
+		create Rectangle
+			width = 20
+			create Rectangle
+				width = parent.width * 2
+			create Animation
+				create Keyframe
+					time = 0s
+					x = 0
+				create Keyframe
+					time = 1s
+					x = 100
+		""", times=(0, 0.25, 0.5, 1, 0.5, 2))
+
+	def test_set_after_compute(self):
+		scene = build("""\
+		create Rectangle
+			width = 20
+			create Rectangle
+				width = parent.width
+		""")
+
+		scene.compute(0)
+
+		rect = scene.elements[0]
+		self.assertEqual(rect.p_width, 20)
+		self.assertEqual(rect.elements[0].p_width, 20)
+
+		rect.set("width", 50)
+		scene.compute(0)
+
+		self.assertEqual(rect.p_width, 50)
+		self.assertEqual(rect.elements[0].p_width, 50)
+
+	def test_add_after_compute(self):
+		scene = build("""\
+		create Rectangle
+			width = 20
+		""")
+
+		scene.compute(0)
+
+		rect = Rectangle()
+		scene.elements[0].add(rect)
+		rect.on_ready()
+		rect.set("height", 7)
+
+		scene.compute(0)
+
+		self.assertEqual(rect.p_height, 7)
+		self.assertEqual(rect.p_width, 20)
+
+	def test_render_after_set(self):
+		scene = build("""\
+		create Rectangle
+			width = 20
+		""")
+
+		renderer = Renderer()
+		before = renderer.render(scene.compute(0) or scene)
+
+		scene.elements[0].set("width", 50)
+		after = renderer.render(scene.compute(0) or scene)
+
+		# Unchanged animated values must not make the renderer reuse the
+		# image drawn before the change
+		self.assertIsNot(before, after)
+		self.assertEqual(scene.elements[0].p_width, 50)
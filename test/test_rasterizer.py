@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from array import array
+from textwrap import dedent
+from unittest import TestCase
+from unittest.mock import patch
+
+from textmation.parser import parse
+from textmation.scenebuilder import SceneBuilder
+from textmation.rasterizer import DisplayList
+from textmation.renderer import Renderer
+
+
+def decode(data):
+	commands = array("d")
+	commands.frombytes(data)
+
+	calls = []
+	for i in range(0, len(commands), 9):
+		op, p1, p2, p3, p4, *color = commands[i:i + 9]
+		color = tuple(color)
+
+		# The same arguments as drawing with a call per shape
+		if op == DisplayList.Rect:
+			calls.append(("rect", (p1, p2, p3, p4), color))
+		elif op == DisplayList.Line:
+			calls.append(("line", (p1, p2), (p3, p4), color))
+		elif op == DisplayList.Circle:
+			calls.append(("circle", (p1, p2), p3, color))
+		elif op == DisplayList.Ellipse:
+			calls.append(("ellipse", (p1, p2), (p3, p4), color))
+		else:
+			raise ValueError(f"Unknown opcode {op}")
+
+	return calls
+
+
+class RecordingImage:
+	def __init__(self, width, height):
+		self.width, self.height = width, height
+		self.calls = []
+
+	def size(self):
+		return self.width, self.height
+
+	def draw_batch(self, data):
+		self.calls.extend(decode(data))
+
+	def draw_text(self, position, text, font, font_size, fill):
+		self.calls.append(("text", text))
+
+	def draw_image(self, rect, image):
+		self.calls.append(("image", image.filename))
+
+
+class RecordingPool:
+	def acquire(self, width, height, background=None):
+		return RecordingImage(width, height)
+
+	def release(self, image):
+		pass
+
+
+class StubFont:
+	def measure_line(self, line, font_size):
+		return len(line) * font_size, font_size
+
+
+class StubImage:
+	def __init__(self, filename):
+		self.filename = filename
+
+	def size(self):
+		return 10, 10
+
+
+class DisplayListTest(TestCase):
+	def test_encoding(self):
+		display_list = DisplayList()
+		display_list.draw_rect(1, 2, 3, 4, (5, 6, 7, 8))
+		display_list.draw_line(-1, -2, 30, 40, (255, 0, 0, 255))
+		display_list.draw_circle(10, 20, 5, (0, 255, 0, 128))
+		display_list.draw_ellipse(7, 8, 9, 10, (300, -20, 0.5, 255))
+
+		self.assertEqual(len(display_list), 4)
+
+		image = RecordingImage(100, 100)
+		data = []
+		image.draw_batch = data.append
+
+		display_list.submit(image)
+
+		self.assertEqual(len(data), 1)
+		self.assertEqual(array("d", data[0]).tolist(), [
+			1, 1, 2, 3, 4, 5, 6, 7, 8,
+			2, -1, -2, 30, 40, 255, 0, 0, 255,
+			3, 10, 20, 5, 0, 0, 255, 0, 128,
+			4, 7, 8, 9, 10, 300, -20, 0.5, 255,
+		])
+
+		self.assertEqual(decode(data[0]), [
+			("rect", (1, 2, 3, 4), (5, 6, 7, 8)),
+			("line", (-1, -2), (30, 40), (255, 0, 0, 255)),
+			("circle", (10, 20), 5, (0, 255, 0, 128)),
+			("ellipse", (7, 8), (9, 10), (300, -20, 0.5, 255)),
+		])
+
+		# Submitting clears the commands, and nothing is drawn when empty
+		self.assertEqual(len(display_list), 0)
+		display_list.submit(image)
+		self.assertEqual(len(data), 1)
+
+	def test_draw_order(self):
+		scene = SceneBuilder().build(parse(dedent("""\
+		width = 200
+		height = 100
+		create Rectangle
+			x = 1
+			y = 2
+			width = 30
+			height = 40
+			fill = rgba(10, 20, 30, 255)
+		create Text
+			text = "Hello"
+		create Circle
+			center_x = 50
+			center_y = 60
+			radius = 7
+			fill = rgba(40, 50, 60, 255)
+		create Ellipse
+			center_x = 70
+			center_y = 80
+			radius_x = 9
+			radius_y = 11
+			fill = rgba(70, 80, 90, 255)
+		create Image
+			filename = "image.png"
+			width = 10
+			height = 10
+		create Line
+			x1 = 3
+			y1 = 4
+			x2 = 5
+			y2 = 6
+			fill = rgba(100, 110, 120, 255)
+		""")))
+
+		renderer = Renderer()
+		renderer._pool = RecordingPool()
+
+		with patch("textmation.renderer.load_font", lambda name: StubFont()), \
+				patch("textmation.renderer.load_image", StubImage):
+			scene.compute(0)
+			# Drawn directly, as render only hands out actual images
+			image = renderer._render(scene)
+
+		# Shapes are batched, but still drawn in between text and images
+		# like when every shape is drawn with its own call
+		self.assertEqual(image.calls, [
+			("rect", (1, 2, 30, 40), (10, 20, 30, 255)),
+			("text", "Hello"),
+			("circle", (50, 60), 7, (40, 50, 60, 255)),
+			("ellipse", (70, 80), (9, 11), (70, 80, 90, 255)),
+			("image", "image.png"),
+			("line", (3, 4), (5, 6), (100, 110, 120, 255)),
+		])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from textwrap import dedent
+from unittest import TestCase
+from unittest.mock import patch
+
+from textmation.parser import parse
+from textmation.scenebuilder import SceneBuilder
+from textmation.datatypes import Color
+from textmation.optimizations import optimize
+from textmation.renderer import Renderer, render_animation
+from textmation.exporters import GifExporter
+
+
+# Stands still between 0.3s and 0.6s, and moves otherwise
+_source = dedent("""\
+frame_rate = 10
+create Rectangle
+	width = 20
+	height = 20
+	create Animation
+		create Keyframe
+			time = 0s
+			x = 0
+		create Keyframe
+			time = 0.3s
+			x = 10
+		create Keyframe
+			time = 0.6s
+			x = 10
+		create Keyframe
+			time = 1s
+			x = 20
+""")
+
+
+# Optimized like the CLI does, such that only x is animated
+def build(string=_source):
+	return optimize(SceneBuilder().build(parse(string)))
+
+
+def render_frames(scene, reuse_frames):
+	return render_animation(scene, reuse_frames=reuse_frames, progress=lambda frame, frame_count: None)
+
+
+class RecordingEncoder:
+	def __init__(self, filename, width, height, frame_rate, samples=None, progress=None):
+		# How many frames each written frame lasts
+		self.counts = []
+		self.finished = False
+
+	def write_frame(self, image):
+		self.counts.append(1)
+
+	def repeat_frame(self):
+		self.counts[-1] += 1
+
+	def finish(self):
+		self.finished = True
+
+
+class RendererTest(TestCase):
+	def test_unchanged_frame_is_reused(self):
+		scene = build()
+		renderer = Renderer()
+
+		scene.compute(0.4)
+		first = renderer.render(scene)
+
+		scene.compute(0.5)
+		self.assertIs(renderer.render(scene), first)
+
+		scene.compute(0.2)
+		self.assertIsNot(renderer.render(scene), first)
+
+	def test_set_forces_redraw(self):
+		scene = build()
+		renderer = Renderer()
+
+		scene.compute(0.4)
+		before = renderer.render(scene)
+		revision = scene.revision
+
+		# The fill isn't animated, so only the revision tells them apart
+		scene.elements[0].set("fill", Color(255, 0, 0))
+		self.assertGreater(scene.revision, revision)
+
+		scene.compute(0.4)
+		after = renderer.render(scene)
+
+		self.assertIsNot(after, before)
+		self.assertNotEqual(after.to_bytes(), before.to_bytes())
+
+	def test_reused_frames_differ(self):
+		expected = [image.to_bytes() for image in render_frames(build(), False)]
+
+		actual = []
+		previous = None
+		for image in render_frames(build(), True):
+			data = image.to_bytes()
+			if image is previous:
+				self.assertEqual(data, actual[-1])
+			actual.append(data)
+			previous = image
+
+		self.assertEqual(actual, expected)
+
+	def test_static_stretch_is_repeated(self):
+		with patch("textmation.exporters.GifEncoder", RecordingEncoder):
+			with GifExporter("unused.gif", 10) as exporter:
+				for image in render_frames(build(), True):
+					exporter.write(image)
+				encoder = exporter._encoder
+
+		# 11 frames, of which the 4 from 0.3s to 0.6s are the same
+		self.assertEqual(encoder.counts, [1, 1, 1, 4, 1, 1, 1, 1])
+		self.assertTrue(encoder.finished)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from textwrap import dedent
+from unittest import TestCase
+
+from textmation.parser import parse
+from textmation.scenebuilder import SceneBuilder
+from textmation.elements import Rectangle
+from textmation.optimizations.timeinvariance import mark_time_invariance
+
+
+_source = dedent("""\
+create Rectangle
+	width = 10
+	create Rectangle
+		width = parent.width
+create Rectangle
+	create Rectangle
+		create Animation
+			create Keyframe
+				time = 0s
+				x = 0
+			create Keyframe
+				time = 1s
+				x = 10
+create Rectangle
+	width = 20
+	create Animation
+		create Keyframe
+			time = 0s
+			y = 0
+		create Keyframe
+			time = 1s
+			y = 10
+create Rectangle
+""")
+
+
+def build():
+	return mark_time_invariance(SceneBuilder().build(parse(_source)))
+
+
+class TimeInvarianceTest(TestCase):
+	def assertFlags(self, element, time_invariant, static):
+		self.assertIs(element.time_invariant, time_invariant)
+		self.assertIs(element.static, static)
+
+	def test_properties(self):
+		scene = build()
+		animated = scene.elements[2]
+
+		self.assertFalse(animated.get("y").time_invariant)
+		self.assertTrue(animated.get("x").time_invariant)
+		self.assertTrue(animated.get("width").time_invariant)
+
+		# References resolve to the defined value, so they never vary
+		self.assertTrue(scene.elements[0].elements[0].get("width").time_invariant)
+
+	def test_elements(self):
+		scene = build()
+		still, parent, animated, empty = scene.elements
+
+		for element, time_invariant, static in (
+			(scene, True, False),
+			(still, True, True),
+			(still.elements[0], True, True),
+			# Only the child is animated, which is drawn on top of the parent
+			(parent, True, False),
+			(parent.elements[0], False, False),
+			(animated, False, False),
+			(empty, True, True),
+		):
+			with self.subTest(element=element):
+				self.assertFlags(element, time_invariant, static)
+
+		animation = animated.children[0]
+		self.assertFlags(animation, True, True)
+		for keyframe in animation.children:
+			self.assertFlags(keyframe, True, True)
+
+	def test_add_clears_static(self):
+		scene = build()
+		still, parent, animated, empty = scene.elements
+		child = still.elements[0]
+
+		child.add(Rectangle())
+
+		# The ancestors of the added element can no longer be drawn ahead
+		# of time, while time invariance is left as is
+		for element in (child, still, scene):
+			with self.subTest(element=element):
+				self.assertFlags(element, True, False)
+
+		self.assertFlags(empty, True, True)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from itertools import product
+from textwrap import dedent
+from unittest import TestCase, skipIf
+
+from textmation.parser import parse
+from textmation.scenebuilder import SceneBuilder
+from textmation.renderer import iter_frame_time
+from textmation.elements.timeline import np
+
+
+_template = dedent("""\
+width = 200
+height = 100
+create Rectangle
+	width = 30
+	fill = rgba(10, 20, 30, 255)
+	create Animation
+		delay = {delay}
+		iterations = {iterations}
+		direction = {direction}
+		fill_mode = {fill_mode}
+		create Keyframe
+			time = 0.5s
+			x = 10%
+			fill = rgba(200, 20, 30, 255)
+		create Keyframe
+			time = 1.3s
+			x = parent.parent.width * 2
+		create Keyframe
+			time = 1.3s
+			y = 7
+		create Keyframe
+			time = 2.1s
+			x = -5
+			y = 40
+""")
+
+_directions = "Normal", "Reverse", "Alternate", "AlternateReverse"
+_fill_modes = "Never", "After", "Before", "Always"
+
+_times = [time for _, time in iter_frame_time(9, 17, inclusive=True)]
+
+
+def build(string):
+	return SceneBuilder().build(parse(string))
+
+
+def computed_values(scene, times, vectorize):
+	if vectorize:
+		scene.vectorize(times)
+
+	rect = scene.elements[0]
+
+	values = []
+	for time in times:
+		scene.compute(time)
+		values.append(tuple(repr(rect.get_computed(name)) for name in ("x", "y", "fill")))
+	return values
+
+
+@skipIf(np is None, "Vectorizing the timeline requires NumPy")
+class TimelineTest(TestCase):
+	def assertMatchesScalar(self, string, times=_times, *, vectorized=1):
+		scalar, vector = build(string), build(string)
+
+		expected = computed_values(scalar, times, False)
+		actual = computed_values(vector, times, True)
+
+		self.assertEqual(len(vector.graph.timeline.columns), vectorized)
+
+		for time, expected_values, actual_values in zip(times, expected, actual):
+			self.assertEqual(actual_values, expected_values, f"time={time}")
+
+	def test_directions_and_fill_modes(self):
+		for direction, fill_mode, iterations, delay in product(_directions, _fill_modes, ("1", "2", "3"), ("0s", "0.7s")):
+			string = _template.format(direction=direction, fill_mode=fill_mode, iterations=iterations, delay=delay)
+			with self.subTest(direction=direction, fill_mode=fill_mode, iterations=iterations, delay=delay):
+				self.assertMatchesScalar(string)
+
+	def test_fractional_iterations(self):
+		for direction, fill_mode, iterations in product(_directions, _fill_modes, ("0.5", "1.5", "2.25")):
+			string = _template.format(direction=direction, fill_mode=fill_mode, iterations=iterations, delay="0.3s")
+			with self.subTest(direction=direction, fill_mode=fill_mode, iterations=iterations):
+				self.assertMatchesScalar(string)
+
+	def test_infinite_iterations(self):
+		for direction, fill_mode in product(_directions, _fill_modes):
+			string = _template.format(direction=direction, fill_mode=fill_mode, iterations="1", delay="0.3s")
+			with self.subTest(direction=direction, fill_mode=fill_mode):
+				scalar, vector = build(string), build(string)
+				for scene in (scalar, vector):
+					scene.elements[0].children[0].set("iterations", float("inf"))
+				expected = computed_values(scalar, _times, False)
+				actual = computed_values(vector, _times, True)
+				self.assertEqual(len(vector.graph.timeline.columns), 1)
+				self.assertEqual(actual, expected)
+
+	def test_times_not_vectorized(self):
+		string = _template.format(direction="Alternate", fill_mode="Always", iterations="2", delay="0s")
+		scene = build(string)
+		scene.vectorize(_times[::2])
+
+		# Times missing from the timeline are computed as usual
+		self.assertEqual(computed_values(scene, _times, False), computed_values(build(string), _times, False))
+
+	def test_animated_reference(self):
+		# Keyframes referencing animated values can't be precomputed
+		self.assertMatchesScalar(dedent("""\
+		create Rectangle
+			create Animation
+				create Keyframe
+					time = 0s
+					width = 10
+				create Keyframe
+					time = 1s
+					width = 90
+			create Animation
+				create Keyframe
+					time = 0s
+					x = 0
+				create Keyframe
+					time = 2s
+					x = parent.width
+		"""))
+
+	def test_without_duration(self):
+		self.assertMatchesScalar(dedent("""\
+		create Rectangle
+			create Animation
+				create Keyframe
+					time = 1s
+					x = 10
+		"""), vectorized=0)
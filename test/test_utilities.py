@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+
+from textmation.utilities import Visitor
+
+
+class Node:
+	pass
+
+
+class Shape(Node):
+	pass
+
+
+class Square(Shape):
+	pass
+
+
+class Circle(Shape):
+	pass
+
+
+class Other:
+	pass
+
+
+class ShapeVisitor(Visitor):
+	visitor_prefix = "_visit_"
+	visitor_base = Node
+
+	def _visit_Shape(self, node):
+		return "shape"
+
+	def _visit_Circle(self, node):
+		return "circle"
+
+
+class SquareVisitor(ShapeVisitor):
+	def _visit_Square(self, node):
+		return "square"
+
+	def _visit_Circle(self, node):
+		return "round"
+
+
+class VisitorTest(TestCase):
+	def test_exact(self):
+		self.assertEqual(ShapeVisitor().visit(Circle()), "circle")
+		self.assertEqual(ShapeVisitor().visit(Shape()), "shape")
+
+	def test_superclass(self):
+		# Square has no visitor, so the one for Shape is found through its MRO
+		self.assertEqual(ShapeVisitor().visit(Square()), "shape")
+		self.assertIs(ShapeVisitor.resolve_visitor(Square), ShapeVisitor._visit_Shape)
+
+	def test_subclass(self):
+		# Resolved for the base visitor first, which must not be reused
+		self.assertEqual(ShapeVisitor().visit(Square()), "shape")
+		self.assertEqual(ShapeVisitor().visit(Circle()), "circle")
+
+		self.assertEqual(SquareVisitor().visit(Square()), "square")
+		self.assertEqual(SquareVisitor().visit(Circle()), "round")
+		self.assertEqual(SquareVisitor().visit(Shape()), "shape")
+
+		self.assertEqual(ShapeVisitor().visit(Square()), "shape")
+		self.assertEqual(ShapeVisitor().visit(Circle()), "circle")
+
+	def test_missing(self):
+		for node in (Node(), Other()):
+			with self.subTest(node=node):
+				with self.assertRaises(AttributeError) as context:
+					ShapeVisitor().visit(node)
+
+				self.assertIn(f"_visit_{node.__class__.__name__}", str(context.exception))
+
+	def test_visitor_base(self):
+		class ObjectVisitor(ShapeVisitor):
+			def _visit_object(self, node):
+				return "object"
+
+		# object isn't derived from the visitor base, so it's never used
+		with self.assertRaises(AttributeError):
+			ObjectVisitor().visit(Other())
+
+		self.assertEqual(ObjectVisitor().visit(Square()), "shape")
@@ -6,15 +6,15 @@ from math import ceil
 import os
 from os.path import abspath, dirname, join
 import time
-import subprocess
+from contextlib import ExitStack
 from argparse import ArgumentParser
 
 from .parser import parse
 from .scenebuilder import SceneBuilder
 from .optimizations import optimize
 from .prepare import prepare
-from .rasterizer import Image
-from .renderer import render_animation, calc_frame_count
+from .renderer import render_animation, render_samples, calc_frame_count
+from .exporters import FramesExporter, GifExporter, FFmpegExporter
 from .pretty import pretty_duration, pprint_ast, pprint_element
 
 
@@ -22,7 +22,38 @@ _ffmpeg_formats = ".mp4", ".avi", ".webm"
 _formats = ".gif", *_ffmpeg_formats
 
 
-def run(input_filename, output_filename, *, save_frames=False, print_ast=False, print_scene=False):
+# The GIF is written while rendering, so the frames written are shown
+# along with the frames rendered. Frames still being written after every
+# frame was rendered are shown on a line of their own.
+class _Progress:
+	def __init__(self, frame_count):
+		self.frame_count = frame_count
+		self.rendered = 0
+		self.written = None
+		self.rendering = True
+		self.finishing = False
+
+	def render(self, frame, frame_count):
+		self.rendered = frame + 1
+		sys.stdout.write(f"\rRendering Frame {self.rendered:04d}/{self.frame_count:04d} ({self.rendered/self.frame_count*100:.0f}%)")
+		if self.written is not None:
+			sys.stdout.write(f", Writing Frame {self.written:04d}/{self.frame_count:04d}")
+		sys.stdout.flush()
+
+	def write(self, written):
+		self.written = written
+		if not self.rendering:
+			self.finishing = True
+			sys.stdout.write(f"\rWriting Frame {written:04d}/{self.frame_count:04d} ({written/self.frame_count*100:.0f}%)")
+			sys.stdout.flush()
+
+	def close(self):
+		if self.finishing:
+			sys.stdout.write("\n")
+			sys.stdout.flush()
+
+
+def run(input_filename, output_filename, *, save_frames=False, jobs=1, global_palette=False, vectorize=False, print_ast=False, print_scene=False):
 	begin = time.time()
 
 	output_dir = abspath(dirname(output_filename))
@@ -30,7 +61,6 @@ def run(input_filename, output_filename, *, save_frames=False, print_ast=False,
 	frames_basename_format = "frame_%04d.png"
 
 	needs_ffmpeg = output_filename.lower().endswith(_ffmpeg_formats)
-	save_frames = save_frames or needs_ffmpeg
 
 	if not output_filename.lower().endswith(_formats):
 		ext = os.path.splitext(output_filename)[1]
@@ -66,45 +96,51 @@ def run(input_filename, output_filename, *, save_frames=False, print_ast=False,
 
 	scene = prepare(scene)
 
-	print(f"Rendering {calc_frame_count(scene.p_duration.seconds, scene.p_frame_rate, inclusive=scene.p_inclusive)} frames...", flush=True)
+	frame_count = calc_frame_count(scene.p_duration.seconds, scene.p_frame_rate, inclusive=scene.p_inclusive)
 
-	inclusive = bool(scene.p_inclusive)
-	frames = render_animation(scene, inclusive=inclusive)
+	print(f"Rendering {frame_count} frames...", flush=True)
 
-	if save_frames:
-		print("Exporting Frames...", flush=True)
+	os.makedirs(output_dir, exist_ok=True)
 
-		os.makedirs(frames_dir, exist_ok=True)
+	inclusive = bool(scene.p_inclusive)
 
-		for i, frame in enumerate(frames, start=1):
-			frame.save(join(frames_dir, frames_basename_format % i))
+	exporters = []
 
-	print("Exporting Animation...", flush=True)
+	progress = _Progress(frame_count)
 
-	os.makedirs(output_dir, exist_ok=True)
+	if save_frames:
+		exporters.append(FramesExporter(frames_dir, frames_basename_format))
 
 	if needs_ffmpeg:
-		subprocess.run([
-			"ffmpeg",
-			"-y", "-loglevel", "error",
-			"-framerate", str(scene.p_frame_rate),
-			"-i", join(frames_dir, frames_basename_format),
-			"-frames", str(len(frames)),
-			"-pix_fmt", "yuv420p",
-			"-an", # Disable audio
-			output_filename,
-		])
+		exporters.append(FFmpegExporter(output_filename, scene.p_frame_rate))
 	else:
-		Image.save_gif(output_filename, frames, scene.p_frame_rate)
+		samples = None
+		if global_palette:
+			print("Sampling Palette...", flush=True)
+			samples = list(render_samples(scene, inclusive=inclusive))
+
+		exporters.append(GifExporter(output_filename, scene.p_frame_rate, samples, progress.write))
+
+	with ExitStack() as stack:
+		stack.callback(progress.close)
+
+		for exporter in exporters:
+			stack.enter_context(exporter)
+
+		for frame in render_animation(scene, inclusive=inclusive, jobs=jobs, reuse_frames=True, vectorize=vectorize, progress=progress.render):
+			for exporter in exporters:
+				exporter.write(frame)
+
+		progress.rendering = False
 
 	end = time.time()
 	duration = end - begin
 	print(f"Rendered in {pretty_duration(ceil(duration))}")
 
 
-def try_run(input_filename, output_filename, *, save_frames=False, verbose=False, print_ast=False, print_scene=False):
+def try_run(input_filename, output_filename, *, save_frames=False, jobs=1, global_palette=False, vectorize=False, verbose=False, print_ast=False, print_scene=False):
 	try:
-		run(input_filename, output_filename, save_frames=save_frames, print_ast=print_ast, print_scene=print_scene)
+		run(input_filename, output_filename, save_frames=save_frames, jobs=jobs, global_palette=global_palette, vectorize=vectorize, print_ast=print_ast, print_scene=print_scene)
 		return 0
 	except Exception as ex:
 		sys.stdout.flush()
@@ -125,13 +161,16 @@ def main():
 	args_parser.add_argument("-o", "--output", default="output.gif", help="Output filename")
 	args_parser.add_argument("filename", help="Textmation file to process")
 	args_parser.add_argument("--save-frames", action="store_const", const=True, default=False)
+	args_parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of processes rendering frames (0 uses all CPU cores)")
+	args_parser.add_argument("--global-palette", action="store_const", const=True, default=False, help="Map every GIF frame to one palette sampled across the animation")
+	args_parser.add_argument("--vectorize", action="store_const", const=True, default=False, help="Precompute animated values for every frame at once (requires NumPy)")
 	args_parser.add_argument("--print-ast", action="store_const", const=True, default=False)
 	args_parser.add_argument("--print-scene", action="store_const", const=True, default=False)
 	args_parser.add_argument("--verbose", action="store_const", const=True, default=False)
 
 	args = args_parser.parse_args()
 
-	return try_run(args.filename, args.output, save_frames=args.save_frames, verbose=args.verbose, print_ast=args.print_ast, print_scene=args.print_scene)
+	return try_run(args.filename, args.output, save_frames=args.save_frames, jobs=args.jobs or None, global_palette=args.global_palette, vectorize=args.vectorize, verbose=args.verbose, print_ast=args.print_ast, print_scene=args.print_scene)
 
 
 if __name__ == "__main__":
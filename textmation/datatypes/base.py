@@ -14,6 +14,8 @@ class Type:
 
 
 class Value:
+	__slots__ = ()
+
 	@property
 	def type(self):
 		raise NotImplementedError
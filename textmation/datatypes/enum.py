@@ -20,6 +20,8 @@ class FlagType(Type):
 
 
 class Enum(Value):
+	__slots__ = ("value",)
+
 	def __init__(self, value):
 		assert isinstance(value, enum.Enum)
 		assert isinstance(value.type, EnumType)
@@ -45,6 +47,8 @@ class Enum(Value):
 
 
 class Flag(Value):
+	__slots__ = ("value",)
+
 	def __init__(self, value):
 		assert isinstance(value, enum.Enum)
 		assert isinstance(value.type, FlagType)
@@ -21,10 +21,12 @@ RectType = _Rect()
 
 
 class Point(Vec2):
-	pass
+	__slots__ = ()
 
 
 class Size(Vec2):
+	__slots__ = ()
+
 	@property
 	def width(self):
 		return self.x
@@ -47,6 +49,8 @@ class Size(Vec2):
 
 
 class Rect(Value):
+	__slots__ = ("position", "size")
+
 	type = RectType
 
 	def __init__(self, *rect):
@@ -34,6 +34,8 @@ NumberType = _Number()
 
 
 class Number(Value):
+	__slots__ = ("value",)
+
 	type = NumberType
 
 	def __init__(self, value):
@@ -167,6 +169,8 @@ class AngleUnit(_Enum):
 
 
 class Angle(Value):
+	__slots__ = ("angle", "unit")
+
 	type = AngleType
 
 	def __init__(self, angle, unit):
@@ -281,6 +285,8 @@ class TimeUnit(_Enum):
 
 @total_ordering
 class Time(Value):
+	__slots__ = ("duration", "unit")
+
 	type = TimeType
 
 	def __init__(self, duration, unit):
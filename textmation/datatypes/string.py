@@ -15,6 +15,8 @@ StringType = _String()
 
 
 class String(Value):
+	__slots__ = ("string",)
+
 	type = StringType
 
 	def __init__(self, string):
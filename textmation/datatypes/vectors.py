@@ -64,7 +64,29 @@ Vec3Type = _Vec3()
 Vec4Type = _Vec4()
 
 
+# Arithmetic creates its results directly, skipping the argument checks
+# in __init__, as the components are already known to be numbers
+def _vec2(x, y):
+	vec = object.__new__(Vec2)
+	vec.x, vec.y = x, y
+	return vec
+
+
+def _vec3(x, y, z):
+	vec = object.__new__(Vec3)
+	vec.x, vec.y, vec.z = x, y, z
+	return vec
+
+
+def _vec4(x, y, z, w):
+	vec = object.__new__(Vec4)
+	vec.x, vec.y, vec.z, vec.w = x, y, z, w
+	return vec
+
+
 class Vec2(Value):
+	__slots__ = ("x", "y")
+
 	type = Vec2Type
 
 	def __init__(self, *xy):
@@ -99,60 +121,60 @@ class Vec2(Value):
 
 	def __add__(self, other):
 		if isinstance(other, Vec2):
-			return Vec2(self.x + other.x, self.y + other.y)
+			return _vec2(self.x + other.x, self.y + other.y)
 		if isinstance(other, Number):
-			return self + Vec2(other.value)
-		if isinstance(other, (int, float)):
-			return self + Vec2(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec2(self.x + other, self.y + other)
 
 	__radd__ = __add__
 
 	def __sub__(self, other):
 		if isinstance(other, Vec2):
-			return Vec2(self.x - other.x, self.y - other.y)
+			return _vec2(self.x - other.x, self.y - other.y)
 		if isinstance(other, Number):
-			return self - Vec2(other.value)
-		if isinstance(other, (int, float)):
-			return self - Vec2(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec2(self.x - other, self.y - other)
 
 	def __rsub__(self, other):
 		if isinstance(other, Number):
-			return Vec2(other.value) - self
-		if isinstance(other, (int, float)):
-			return Vec2(other) - self
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec2(other - self.x, other - self.y)
 
 	def __mul__(self, other):
 		if isinstance(other, Vec2):
-			return Vec2(self.x * other.x, self.y * other.y)
+			return _vec2(self.x * other.x, self.y * other.y)
 		if isinstance(other, Number):
-			return self * Vec2(other.value)
-		if isinstance(other, (int, float)):
-			return self * Vec2(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec2(self.x * other, self.y * other)
 
 	__rmul__ = __mul__
 
 	def __truediv__(self, other):
 		if isinstance(other, Vec2):
-			return Vec2(self.x / other.x, self.y / other.y)
+			return _vec2(self.x / other.x, self.y / other.y)
 		if isinstance(other, Number):
-			return self / Vec2(other.value)
-		if isinstance(other, (int, float)):
-			return self / Vec2(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec2(self.x / other, self.y / other)
 
 	def __rtruediv__(self, other):
 		if isinstance(other, Number):
-			return Vec2(other.value) / self
-		if isinstance(other, (int, float)):
-			return Vec2(other) / self
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec2(other / self.x, other / self.y)
 
 	def __neg__(self):
-		return Vec2(-self.x, -self.y)
+		return _vec2(-self.x, -self.y)
 
 	def __eq__(self, other):
 		if isinstance(other, Vec2):
@@ -168,6 +190,8 @@ class Vec2(Value):
 
 
 class Vec3(Value):
+	__slots__ = ("x", "y", "z")
+
 	type = Vec3Type
 
 	def __init__(self, *xyz):
@@ -208,72 +232,72 @@ class Vec3(Value):
 
 	def __add__(self, other):
 		if isinstance(other, Vec3):
-			return Vec3(self.x + other.x, self.y + other.y, self.z + other.z)
+			return _vec3(self.x + other.x, self.y + other.y, self.z + other.z)
 		if isinstance(other, Vec2):
 			return self + Vec3(*other.xy)
 		if isinstance(other, Number):
-			return self + Vec3(other.value)
-		if isinstance(other, (int, float)):
-			return self + Vec3(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec3(self.x + other, self.y + other, self.z + other)
 
 	__radd__ = __add__
 
 	def __sub__(self, other):
 		if isinstance(other, Vec3):
-			return Vec3(self.x - other.x, self.y - other.y, self.z - other.z)
+			return _vec3(self.x - other.x, self.y - other.y, self.z - other.z)
 		if isinstance(other, Vec2):
 			return self - Vec3(*other.xy)
 		if isinstance(other, Number):
-			return self - Vec3(other.value)
-		if isinstance(other, (int, float)):
-			return self - Vec3(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec3(self.x - other, self.y - other, self.z - other)
 
 	def __rsub__(self, other):
 		if isinstance(other, Vec2):
 			return Vec3(*other.xy) - self
 		if isinstance(other, Number):
-			return Vec3(other.value) - self
-		if isinstance(other, (int, float)):
-			return Vec3(other) - self
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec3(other - self.x, other - self.y, other - self.z)
 
 	def __mul__(self, other):
 		if isinstance(other, Vec3):
-			return Vec3(self.x * other.x, self.y * other.y, self.z * other.z)
+			return _vec3(self.x * other.x, self.y * other.y, self.z * other.z)
 		if isinstance(other, Vec2):
 			return self * Vec3(*other.xy)
 		if isinstance(other, Number):
-			return self * Vec3(other.value)
-		if isinstance(other, (int, float)):
-			return self * Vec3(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec3(self.x * other, self.y * other, self.z * other)
 
 	__rmul__ = __mul__
 
 	def __truediv__(self, other):
 		if isinstance(other, Vec3):
-			return Vec3(self.x / other.x, self.y / other.y, self.z / other.z)
+			return _vec3(self.x / other.x, self.y / other.y, self.z / other.z)
 		if isinstance(other, Vec2):
 			return self / Vec3(*other.xy)
 		if isinstance(other, Number):
-			return self / Vec3(other.value)
-		if isinstance(other, (int, float)):
-			return self / Vec3(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec3(self.x / other, self.y / other, self.z / other)
 
 	def __rtruediv__(self, other):
 		if isinstance(other, Vec2):
 			return Vec3(*other.xy) / self
 		if isinstance(other, Number):
-			return Vec3(other.value) / self
-		if isinstance(other, (int, float)):
-			return Vec3(other) / self
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec3(other / self.x, other / self.y, other / self.z)
 
 	def __neg__(self):
-		return Vec3(-self.x, -self.y, -self.z)
+		return _vec3(-self.x, -self.y, -self.z)
 
 	def __eq__(self, other):
 		if isinstance(other, Vec3):
@@ -290,6 +314,8 @@ class Vec3(Value):
 
 
 class Vec4(Value):
+	__slots__ = ("x", "y", "z", "w")
+
 	type = Vec4Type
 
 	def __init__(self, *xyzw):
@@ -340,31 +366,31 @@ class Vec4(Value):
 
 	def __add__(self, other):
 		if isinstance(other, Vec4):
-			return Vec4(self.x + other.x, self.y + other.y, self.z + other.z, self.w + other.w)
+			return _vec4(self.x + other.x, self.y + other.y, self.z + other.z, self.w + other.w)
 		if isinstance(other, Vec3):
 			return self + Vec4(*other.xyz)
 		if isinstance(other, Vec2):
 			return self + Vec4(*other.xy)
 		if isinstance(other, Number):
-			return self + Vec4(other.value)
-		if isinstance(other, (int, float)):
-			return self + Vec4(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec4(self.x + other, self.y + other, self.z + other, self.w + other)
 
 	__radd__ = __add__
 
 	def __sub__(self, other):
 		if isinstance(other, Vec4):
-			return Vec4(self.x - other.x, self.y - other.y, self.z - other.z, self.w - other.w)
+			return _vec4(self.x - other.x, self.y - other.y, self.z - other.z, self.w - other.w)
 		if isinstance(other, Vec3):
 			return self - Vec4(*other.xyz)
 		if isinstance(other, Vec2):
 			return self - Vec4(*other.xy)
 		if isinstance(other, Number):
-			return self - Vec4(other.value)
-		if isinstance(other, (int, float)):
-			return self - Vec4(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec4(self.x - other, self.y - other, self.z - other, self.w - other)
 
 	def __rsub__(self, other):
 		if isinstance(other, Vec3):
@@ -372,38 +398,38 @@ class Vec4(Value):
 		if isinstance(other, Vec2):
 			return Vec4(*other.xy) - self
 		if isinstance(other, Number):
-			return Vec4(other.value) - self
-		if isinstance(other, (int, float)):
-			return Vec4(other) - self
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec4(other - self.x, other - self.y, other - self.z, other - self.w)
 
 	def __mul__(self, other):
 		if isinstance(other, Vec4):
-			return Vec4(self.x * other.x, self.y * other.y, self.z * other.z, self.w * other.w)
+			return _vec4(self.x * other.x, self.y * other.y, self.z * other.z, self.w * other.w)
 		if isinstance(other, Vec3):
 			return self * Vec4(*other.xyz)
 		if isinstance(other, Vec2):
 			return self * Vec4(*other.xy)
 		if isinstance(other, Number):
-			return self * Vec4(other.value)
-		if isinstance(other, (int, float)):
-			return self * Vec4(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec4(self.x * other, self.y * other, self.z * other, self.w * other)
 
 	__rmul__ = __mul__
 
 	def __truediv__(self, other):
 		if isinstance(other, Vec4):
-			return Vec4(self.x / other.x, self.y / other.y, self.z / other.z, self.w / other.w)
+			return _vec4(self.x / other.x, self.y / other.y, self.z / other.z, self.w / other.w)
 		if isinstance(other, Vec3):
 			return self / Vec4(*other.xyz)
 		if isinstance(other, Vec2):
 			return self / Vec4(*other.xy)
 		if isinstance(other, Number):
-			return self / Vec4(other.value)
-		if isinstance(other, (int, float)):
-			return self / Vec4(other)
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec4(self.x / other, self.y / other, self.z / other, self.w / other)
 
 	def __rtruediv__(self, other):
 		if isinstance(other, Vec3):
@@ -411,13 +437,13 @@ class Vec4(Value):
 		if isinstance(other, Vec2):
 			return Vec4(*other.xy) / self
 		if isinstance(other, Number):
-			return Vec4(other.value) / self
-		if isinstance(other, (int, float)):
-			return Vec4(other) / self
-		return NotImplemented
+			other = other.value
+		elif not isinstance(other, (int, float)):
+			return NotImplemented
+		return _vec4(other / self.x, other / self.y, other / self.z, other / self.w)
 
 	def __neg__(self):
-		return Vec4(-self.x, -self.y, -self.z, -self.w)
+		return _vec4(-self.x, -self.y, -self.z, -self.w)
 
 	def __eq__(self, other):
 		if isinstance(other, Vec4):
@@ -435,6 +461,8 @@ class Vec4(Value):
 
 
 class Color(Vec4):
+	__slots__ = ()
+
 	def __init__(self, r=0, g=None, b=None, a=255):
 		if b is None:
 			b = r if g is None else 0
@@ -442,3 +470,9 @@ class Color(Vec4):
 			g = r
 
 		super().__init__(r, g, b, a)
+
+
+# Vectors are never modified in place, so common constants can be shared
+TRANSPARENT = Vec4(0, 0, 0, 0)
+BLACK = Vec4(0, 0, 0, 255)
+WHITE = Vec4(255, 255, 255, 255)
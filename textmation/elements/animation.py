@@ -1,8 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from itertools import islice
 from functools import total_ordering
+from bisect import bisect_right
 from math import isinf
 from enum import IntEnum
 
@@ -52,6 +52,16 @@ def ping_pong(value, lower=0, upper=1):
 		return lower + ping_ponged
 
 
+def _in_segment(times, count, i, time):
+	if i > count:
+		return False
+	if i > 0 and time < times[i - 1]:
+		return False
+	if i < count and time >= times[i]:
+		return False
+	return True
+
+
 @register_enum
 class AnimationDirection(IntEnum):
 	Normal           = 1
@@ -75,6 +85,8 @@ class Animation(Element):
 		super().__init__()
 		self.element_properties = None
 		self.keyframes = []
+		self._keyframe_times = None
+		self._cursor = 0
 		# self._duration = Time(0, TimeUnit.Seconds)
 
 	def on_ready(self):
@@ -114,7 +126,9 @@ class Animation(Element):
 
 	def compute(self, time):
 		super().compute(time)
+		self.animate(time)
 
+	def animate(self, time):
 		if not self.is_affecting(time):
 			return
 
@@ -163,6 +177,7 @@ class Animation(Element):
 
 		if isinstance(keyframe, Keyframe):
 			self.keyframes.append(keyframe)
+			self.reset_keyframe_times()
 		else:
 			raise NotImplementedError
 
@@ -222,18 +237,36 @@ class Animation(Element):
 	def fill_mode(self):
 		return self.p_fill_mode
 
-	def get_between(self, time):
-		first = self.keyframes[0]
-		if time < first.time.seconds:
-			return first, first
+	@property
+	def keyframe_times(self):
+		# Keyframe times can refer to properties assigned after on_created,
+		# so they're only collected once the animation is first computed
+		if self._keyframe_times is None:
+			self._keyframe_times = [keyframe.time.seconds for keyframe in self.keyframes]
+		return self._keyframe_times
 
-		last = self.keyframes[-1]
-		if time >= last.time.seconds:
-			return last, last
+	def reset_keyframe_times(self):
+		self._keyframe_times = None
+		self._cursor = 0
 
-		for i, keyframe in enumerate(islice(self.keyframes, 1, None), start=1):
-			if time < keyframe.time.seconds:
-				return self.keyframes[i - 1], keyframe
+	def get_between(self, time):
+		times = self.keyframe_times
+		count = len(times)
+
+		# Frames are mostly computed in order, so the time usually falls
+		# within the same or the next segment as the previous lookup
+		i = self._cursor
+		if not _in_segment(times, count, i, time):
+			i += 1
+			if not _in_segment(times, count, i, time):
+				i = bisect_right(times, time)
+			self._cursor = i
+
+		if i == 0:
+			return self.keyframes[0], self.keyframes[0]
+		if i == count:
+			return self.keyframes[-1], self.keyframes[-1]
+		return self.keyframes[i - 1], self.keyframes[i]
 
 	def is_affecting(self, time):
 		if self.fill_mode == AnimationFillMode.Always:
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import operator
+
+from ..datatypes import Number, NumberType, Vec2, Vec2Type, Vec3, Vec3Type, Vec4, Vec4Type, BinOp, UnaryOp, Call
+from .element import ElementProperty, Percentage
+
+
+# Compiled expressions work on plain values, numbers are ints or floats
+# and vectors are tuples. They are only boxed again at the boundary.
+
+
+class CompileError(Exception):
+	pass
+
+
+_dimensions = {
+	NumberType: 0,
+	Vec2Type: 2,
+	Vec3Type: 3,
+	Vec4Type: 4,
+}
+
+_boxers = {
+	0: Number,
+	2: lambda value: Vec2(*value),
+	3: lambda value: Vec3(*value),
+	4: lambda value: Vec4(*value),
+}
+
+_operators = {
+	"+": operator.add,
+	"-": operator.sub,
+	"*": operator.mul,
+	"/": operator.truediv,
+	"//": operator.floordiv,
+	"%": operator.mod,
+}
+
+
+def dimension_of(type):
+	try:
+		return _dimensions[type]
+	except KeyError:
+		raise CompileError(f"Cannot compile values of type {type.name}") from None
+
+
+def box(value, dimension):
+	return _boxers[dimension](value)
+
+
+def _unboxer(dimension):
+	if dimension == 0:
+		return operator.attrgetter("value")
+	return tuple
+
+
+def _pad(value, dimension):
+	# Same as the vector types, smaller vectors are padded with zeros
+	# and numbers are repeated for every component
+	if isinstance(value, tuple):
+		return value + (0,) * (dimension - len(value))
+	return (value,) * dimension
+
+
+def _compile(value):
+	dimension = dimension_of(value.type)
+
+	if isinstance(value, ElementProperty):
+		unbox = _unboxer(dimension)
+		return lambda: unbox(value.eval()), dimension
+
+	if isinstance(value, Percentage):
+		relative = value.relative
+		if relative is None or dimension_of(relative.type) != 0:
+			raise CompileError("Cannot compile percentage without a relative number")
+		factor = value.value / 100
+		return lambda: relative.eval().value * factor, dimension
+
+	if isinstance(value, Number):
+		number = value.value
+		return lambda: number, dimension
+
+	if isinstance(value, (Vec2, Vec3, Vec4)):
+		vector = tuple(value)
+		return lambda: vector, dimension
+
+	if isinstance(value, BinOp):
+		return _compile_bin_op(value), dimension
+
+	if isinstance(value, UnaryOp):
+		operand, operand_dimension = _compile(value.operand)
+		if operand_dimension == 0:
+			return lambda: -operand(), dimension
+		return lambda: tuple(-x for x in operand()), dimension
+
+	if isinstance(value, Call):
+		return _compile_call(value), dimension
+
+	raise CompileError(f"Cannot compile {value.__class__.__name__}")
+
+
+def _compile_bin_op(bin_op):
+	try:
+		op = _operators[bin_op.op]
+	except KeyError:
+		raise CompileError(f"Cannot compile operator {bin_op.op!r}") from None
+
+	lhs, lhs_dimension = _compile(bin_op.lhs)
+	rhs, rhs_dimension = _compile(bin_op.rhs)
+
+	dimension = max(lhs_dimension, rhs_dimension)
+
+	if dimension == 0:
+		return lambda: op(lhs(), rhs())
+
+	if lhs_dimension == rhs_dimension:
+		return lambda: tuple(map(op, lhs(), rhs()))
+
+	return lambda: tuple(map(op, _pad(lhs(), dimension), _pad(rhs(), dimension)))
+
+
+def _compile_call(call):
+	unbox = _unboxer(dimension_of(call.type))
+	func = call.func
+
+	args = []
+	for arg in call.args:
+		try:
+			evaluate, dimension = _compile(arg)
+		except CompileError:
+			args.append(arg.eval)
+		else:
+			args.append(lambda evaluate=evaluate, boxer=_boxers[dimension]: boxer(evaluate()))
+
+	return lambda: unbox(func(*(arg() for arg in args)))
+
+
+# Returns None when value has to be evaluated as a tree instead
+def compile_value(value):
+	try:
+		evaluate, dimension = _compile(value)
+	except CompileError:
+		return None
+
+	boxer = _boxers[dimension]
+	return lambda: boxer(evaluate())
@@ -41,10 +41,10 @@ class Rectangle(Drawable):
 	def on_ready(self):
 		super().on_ready()
 
-		self.define("color", Vec4(255, 255, 255, 255))
+		self.define("color", WHITE)
 		self.define("fill", self.get("color"))
 
-		self.define("outline", Vec4(0, 0, 0, 0), Vec4)
+		self.define("outline", TRANSPARENT, Vec4)
 		self.define("outline_width", 1)
 
 
@@ -69,10 +69,10 @@ class Circle(Drawable):
 		self.set("width", BinOp("*", self.get("radius"), Number(2)))
 		self.set("height", BinOp("*", self.get("radius"), Number(2)))
 
-		self.define("color", Vec4(255, 255, 255, 255))
+		self.define("color", WHITE)
 		self.define("fill", self.get("color"))
 
-		self.define("outline", Vec4(0, 0, 0, 0), Vec4)
+		self.define("outline", TRANSPARENT, Vec4)
 		self.define("outline_width", 1)
 
 
@@ -102,10 +102,10 @@ class Ellipse(Drawable):
 		self.set("width", BinOp("*", self.get("radius_x"), Number(2)))
 		self.set("height", BinOp("*", self.get("radius_y"), Number(2)))
 
-		self.define("color", Vec4(255, 255, 255, 255))
+		self.define("color", WHITE)
 		self.define("fill", self.get("color"))
 
-		self.define("outline", Vec4(0, 0, 0, 0), Vec4)
+		self.define("outline", TRANSPARENT, Vec4)
 		self.define("outline_width", 1)
 
 
@@ -130,7 +130,7 @@ class Line(Drawable):
 		self.set("x", self.get("x1"))
 		self.set("y", self.get("y1"))
 
-		self.define("color", Vec4(255, 255, 255, 255))
+		self.define("color", WHITE)
 		self.define("fill", self.get("color"))
 
 		# TODO: Intersects with Drawable's width
@@ -191,5 +191,5 @@ class Text(Drawable):
 		self.define("anchor", TextAnchor.Default, constant=True)
 		self.define("alignment", TextAlignment.Default, constant=True)
 
-		self.define("color", Vec4(255, 255, 255, 255))
+		self.define("color", WHITE)
 		self.define("fill", self.get("color"))
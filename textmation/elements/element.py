@@ -10,6 +10,8 @@ from ..utilities import iter_all_subclasses
 
 
 class Percentage(Number):
+	__slots__ = ("relative",)
+
 	def __init__(self, value):
 		super().__init__(value)
 		self.relative = None
@@ -17,7 +19,7 @@ class Percentage(Number):
 	def eval(self):
 		assert isinstance(self.relative, ElementProperty)
 		# return BinOp("*", self.relative.eval(), BinOp("/", Number(self.value), Number(100))).eval()
-		return self.relative.eval() * (self / Number(100))
+		return self.relative.eval() * (self.value / 100)
 
 	def apply(self, relative):
 		assert isinstance(relative, ElementProperty)
@@ -57,6 +59,23 @@ def _iter_cycles(current, target, path):
 			yield from _iter_cycles(value, target, new_path)
 
 
+# Only walks each value once, unlike find_cycles which enumerates every path
+def has_cycle(value):
+	visited = set()
+	stack = list(value.iter_values())
+
+	while stack:
+		current = stack.pop()
+		if current is value:
+			return True
+		if id(current) in visited:
+			continue
+		visited.add(id(current))
+		stack.extend(current.iter_values())
+
+	return False
+
+
 def find_cycles(value):
 	paths = []
 	for path in _iter_cycles(value, value, [value]):
@@ -90,6 +109,9 @@ class ElementProperty(Value):
 		self.readonly = False
 		self.constant = constant
 		self.keyframes = []
+		self.cached = None
+		self.evaluator = None
+		self.time_invariant = False
 
 		self.set(value)
 
@@ -112,11 +134,12 @@ class ElementProperty(Value):
 		self.check_value(value)
 
 		self.value = value
+		self.cached = None
+		self.evaluator = None
 		self.value.apply(self.relative)
 
-		paths = find_cycles(self)
-		if paths:
-			raise CircularReferenceError(f"Circular dependency encountered", paths)
+		if has_cycle(self):
+			raise CircularReferenceError(f"Circular dependency encountered", find_cycles(self))
 
 	def check_value(self, value):
 		if isinstance(value, (int, float)):
@@ -138,6 +161,10 @@ class ElementProperty(Value):
 				raise ElementPropertyConstantError(f"Cannot assign non-constant value to property {self.name!r}")
 
 	def eval(self):
+		if self.cached is not None:
+			return self.cached
+		if self.evaluator is not None:
+			return self.evaluator()
 		return self.value.eval()
 
 	def fold(self):
@@ -180,6 +207,8 @@ class Element(Value):
 		self.computed_properties = {}
 		self.children = []
 		self.parent = None
+		self.time_invariant = False
+		self.static = False
 
 	def on_init(self):
 		pass
@@ -216,29 +245,32 @@ class Element(Value):
 
 		self.properties[name] = ElementProperty(name, value, types, relative=relative, readonly=readonly, constant=constant)
 
-		if not constant:
-			self.computed_properties[name] = ElementProperty(name, value, types, relative=relative, readonly=readonly)
-
 	def get(self, name):
 		return self.properties[name]
 
 	def set(self, name, value):
 		assert isinstance(name, str)
 		self.get(name).set(value)
-		self.set_computed(name, value)
+		# Until it's computed again, the value comes from the definition
+		self.computed_properties.pop(name, None)
+		self.__dict__.pop("p_" + name, None)
+		self.invalidate()
 
 	def get_computed(self, name):
 		with suppress(KeyError):
 			return self.computed_properties[name]
-		return self.get(name)
+		return self.get(name).eval()
 
+	# Computed values are already evaluated, so they're also stored unboxed
+	# as p_ attributes, which are then found without going through __getattr__
 	def set_computed(self, name, value):
 		assert isinstance(name, str)
-		self.get_computed(name).set(value)
+		assert isinstance(value, Value)
+		self.computed_properties[name] = value
+		self.__dict__["p_" + name] = value.unbox()
 
 	def check_value(self, name, value):
 		self.get(name).check_value(value)
-		# No need to check computed_properties since they're the same
 
 	# def has(self, name):
 	# 	return name in self.properties
@@ -246,7 +278,7 @@ class Element(Value):
 	def eval(self, name=None):
 		if name is None:
 			return self
-		return self.get_computed(name).eval()
+		return self.get_computed(name)
 
 	def is_constant(self):
 		return True
@@ -263,6 +295,24 @@ class Element(Value):
 		element.parent = self
 		self.children.append(element)
 
+		# The added element could be time-varying
+		parent = self
+		while parent is not None:
+			parent.static = False
+			parent = parent.parent
+
+		self.invalidate()
+
+	# Notifies the root, that anything computed from the tree is outdated
+	def invalidate(self):
+		root = self
+		while root.parent is not None:
+			root = root.parent
+		root.on_invalidate()
+
+	def on_invalidate(self):
+		pass
+
 	def traverse(self):
 		yield self
 		for child in self.children:
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from collections import deque
+
+from ..datatypes import Expression
+from .element import ElementProperty, Percentage
+from .animation import Animation, Keyframe
+from .compiler import compile_value
+
+
+def iter_dependencies(value):
+	if isinstance(value, ElementProperty):
+		yield value
+		return
+
+	if isinstance(value, Percentage) and value.relative is not None:
+		yield value.relative
+
+	for value in value.iter_values():
+		yield from iter_dependencies(value)
+
+
+class PropertyNode:
+	def __init__(self, element, name, property):
+		self.element = element
+		self.name = name
+		self.property = property
+		self.dependencies = []
+		self.dependents = []
+
+	def __repr__(self):
+		return f"<{self.__class__.__name__}: {self.element!r}.{self.name}>"
+
+
+def _sort_nodes(nodes):
+	indegrees = {node: len(node.dependencies) for node in nodes}
+	queue = deque(node for node in nodes if indegrees[node] == 0)
+
+	ordered = []
+	while queue:
+		node = queue.popleft()
+		ordered.append(node)
+
+		for dependent in node.dependents:
+			indegrees[dependent] -= 1
+			if indegrees[dependent] == 0:
+				queue.append(dependent)
+
+	# Leftovers are part of a cycle through a relative property, which
+	# find_cycles doesn't see. Keep them, they fail the same way as before
+	if len(ordered) < len(nodes):
+		ordered.extend(node for node in nodes if indegrees[node] > 0)
+
+	return ordered
+
+
+class PropertyGraph:
+	def __init__(self, scene):
+		nodes = {}
+
+		self.animations = []
+
+		for element in scene.traverse():
+			if isinstance(element, Animation):
+				self.animations.append(element)
+				element.reset_keyframe_times()
+
+			# Keyframes transparently provide values for their animation,
+			# their properties are never computed. Instead they're evaluated
+			# on every frame, so their expressions are compiled up front
+			if isinstance(element, Keyframe):
+				for property in element.properties.values():
+					if not property.readonly and isinstance(property.value, (Expression, Percentage)):
+						property.evaluator = compile_value(property.value)
+				continue
+
+			for name, property in element.properties.items():
+				if property.readonly:
+					continue
+				nodes[property] = PropertyNode(element, name, property)
+
+		for node in nodes.values():
+			for dependency in iter_dependencies(node.property.value):
+				dependency = nodes.get(dependency)
+				if dependency is None or dependency in node.dependencies:
+					continue
+				node.dependencies.append(dependency)
+				dependency.dependents.append(node)
+
+		self.nodes = _sort_nodes(list(nodes.values()))
+
+		# Only the properties marked as time-varying change between frames,
+		# everything else is computed once. Unless the scene went through
+		# mark_time_invariance, every property is assumed to vary
+		self.animated = [node for node in self.nodes if not node.property.time_invariant]
+
+		self.evaluated = False
+		self.timeline = None
+
+	def evaluate(self):
+		# Values cached by a previous graph may be outdated
+		for node in self.nodes:
+			node.property.cached = None
+
+		for node in self.nodes:
+			property = node.property
+			value = property.value.eval()
+			node.element.set_computed(node.name, value)
+			property.cached = value
+
+		self.evaluated = True
+
+	def compute(self, time):
+		if not self.evaluated:
+			self.evaluate()
+		else:
+			for node in self.animated:
+				node.element.set_computed(node.name, node.property.cached)
+
+		for animation in self.animations:
+			if self.timeline is None or not self.timeline.animate(animation, time):
+				animation.animate(time)
+
+	def signature(self):
+		# Everything else is the same on every frame, so the computed values
+		# of the time-varying properties fully determine what is drawn
+		return tuple(node.element.get_computed(node.name).unbox() for node in self.animated)
@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from ..datatypes import Number, Time, TimeUnit, Vec4
+from ..datatypes import Number, Time, TimeUnit, BLACK
 from .drawables import BaseDrawable
 from .animation import Animation
+from .graph import PropertyGraph
+from .timeline import Timeline
 
 
 def _duration(scene):
@@ -20,6 +22,8 @@ class Scene(BaseDrawable):
 	def __init__(self):
 		super().__init__()
 		self._duration = Time(0, TimeUnit.Seconds)
+		self.graph = None
+		self.revision = 0
 
 	def on_ready(self):
 		super().on_ready()
@@ -27,7 +31,7 @@ class Scene(BaseDrawable):
 		self.define("width", 100, Number, constant=True)
 		self.define("height", 100, Number, constant=True)
 
-		self.define("background", Vec4(0, 0, 0, 255))
+		self.define("background", BLACK)
 
 		self.define("frame_rate", 20, Number, constant=True)
 
@@ -39,3 +43,24 @@ class Scene(BaseDrawable):
 		# Only calculate duration if it wasn't manually set
 		if self._duration is self.get("duration").get():
 			self.set("duration", _duration(self))
+
+	def on_invalidate(self):
+		# Properties or elements changed, so everything is evaluated again
+		self.graph = None
+		self.revision += 1
+
+	def compute(self, time):
+		if self.graph is None:
+			self.graph = PropertyGraph(self)
+		self.graph.compute(time)
+
+	# Precomputes the animated values for every one of the given times
+	def vectorize(self, times):
+		if self.graph is None:
+			self.graph = PropertyGraph(self)
+		self.graph.timeline = Timeline(self.graph.animations, times)
+
+	def signature(self):
+		if self.graph is None:
+			return None
+		return self.graph.signature()
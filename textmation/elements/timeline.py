@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+from .graph import iter_dependencies
+from .animation import AnimationDirection, AnimationFillMode, is_int, even, odd
+from .compiler import CompileError, dimension_of, box
+
+
+# Mirrors the scalar timing in Animation.animate and Animation.is_affecting,
+# the operations are kept in the same order such that the results match
+
+
+def _is_fixed(value, fixed):
+	for dependency in iter_dependencies(value):
+		if dependency not in fixed:
+			# Assume varying while visiting, in case of a cycle
+			fixed[dependency] = False
+			fixed[dependency] = (len(dependency.keyframes) == 0) and _is_fixed(dependency.value, fixed)
+		if not fixed[dependency]:
+			return False
+	return True
+
+
+def _ping_pong(value, lower, upper):
+	length = upper - lower
+	length2 = length * 2
+	ping_ponged = np.abs(np.mod(value, length2))
+	return np.where(ping_ponged >= length, lower + length2 - ping_ponged, lower + ping_ponged)
+
+
+def _affecting(animation, times):
+	fill_mode = animation.fill_mode
+
+	if fill_mode == AnimationFillMode.Always:
+		return np.ones(len(times), dtype=bool)
+
+	if animation.infinite_iterations:
+		return times >= animation.begin_time
+
+	if fill_mode == AnimationFillMode.Never:
+		return (animation.begin_time <= times) & (times <= animation.end_time)
+	if fill_mode == AnimationFillMode.After:
+		return times >= animation.begin_time
+	if fill_mode == AnimationFillMode.Before:
+		return times <= animation.end_time
+
+	return np.zeros(len(times), dtype=bool)
+
+
+def _local_times(animation, times):
+	begin_time = animation._begin_time
+	end_time = animation._end_time
+	duration = animation.iteration_duration
+	direction = animation.direction
+	iterations = animation.iterations
+
+	times = times - animation.p_delay.seconds
+	local = times.copy()
+
+	if not animation.infinite_iterations and is_int(iterations):
+		after = times >= end_time
+
+		if direction == AnimationDirection.Normal:
+			local[after] = end_time
+		if direction == AnimationDirection.Reverse:
+			local[after] = begin_time
+		if direction == AnimationDirection.Alternate:
+			local[after] = end_time if odd(iterations) else begin_time
+		if direction == AnimationDirection.AlternateReverse:
+			local[after] = end_time if even(iterations) else begin_time
+	else:
+		after = np.zeros(len(times), dtype=bool)
+
+	running = ~after & (times >= begin_time)
+	time = times[running] - begin_time
+
+	if direction in (AnimationDirection.Normal, AnimationDirection.Reverse):
+		time = np.mod(time, duration)
+		if direction == AnimationDirection.Reverse:
+			time = duration - time
+	elif direction == AnimationDirection.Alternate:
+		time = _ping_pong(time, 0, duration)
+	elif direction == AnimationDirection.AlternateReverse:
+		time = _ping_pong(time + duration, 0, duration)
+
+	local[running] = time + begin_time
+
+	return local
+
+
+def _keyframe_values(animation, name, fixed):
+	values = []
+	dimension = None
+
+	for keyframe in animation.keyframes:
+		property = keyframe.get(name)
+		if not _is_fixed(property.value, fixed):
+			return None
+
+		value = keyframe.eval(name)
+
+		try:
+			value_dimension = dimension_of(value.type)
+		except CompileError:
+			return None
+
+		if dimension is None:
+			dimension = value_dimension
+		elif dimension != value_dimension:
+			return None
+
+		values.append(value)
+
+	return values, dimension
+
+
+def _vectorize(animation, times, fixed):
+	# Without a duration the scalar timing is kept, which also keeps
+	# any error it raises for the frames it actually renders
+	if animation.iteration_duration == 0:
+		return None
+
+	keyframe_values = {}
+	for name in animation.element_properties:
+		values = _keyframe_values(animation, name, fixed)
+		if values is None:
+			return None
+		keyframe_values[name] = values
+
+	affecting = _affecting(animation, times)
+	local = _local_times(animation, times)
+
+	keyframe_times = np.array([keyframe.time.seconds for keyframe in animation.keyframes], dtype=float)
+	last = len(keyframe_times) - 1
+
+	after = np.searchsorted(keyframe_times, local, side="right")
+	same = (after == 0) | (after > last)
+	after = np.clip(after, 0, last)
+	before = np.where(same, after, after - 1)
+
+	lower = keyframe_times[before]
+	upper = keyframe_times[after]
+	t = np.where(same, 0.0, (local - lower) / np.where(same, 1.0, upper - lower))
+
+	columns = []
+
+	for name, (values, dimension) in keyframe_values.items():
+		if dimension == 0:
+			array = np.array([value.value for value in values], dtype=float)
+			interpolated = (1 - t) * array[before] + t * array[after]
+		else:
+			array = np.array([tuple(value) for value in values], dtype=float)
+			interpolated = (1 - t)[:, None] * array[before] + t[:, None] * array[after]
+
+		column = []
+		for frame, value in enumerate(interpolated.tolist()):
+			if not affecting[frame]:
+				column.append(None)
+			elif same[frame]:
+				column.append(values[before[frame]])
+			else:
+				column.append(box(value, dimension))
+
+		columns.append((name, column))
+
+	return columns
+
+
+class Timeline:
+	def __init__(self, animations, times):
+		if np is None:
+			raise Exception("Vectorizing the timeline requires NumPy")
+
+		self.frames = {time: frame for frame, time in enumerate(times)}
+		self.columns = {}
+
+		times = np.array(times, dtype=float)
+		fixed = {}
+
+		for animation in animations:
+			columns = _vectorize(animation, times, fixed)
+			if columns is not None:
+				self.columns[animation] = columns
+
+	# Returns False when the animation has to be computed as usual
+	def animate(self, animation, time):
+		columns = self.columns.get(animation)
+		if columns is None:
+			return False
+
+		frame = self.frames.get(time)
+		if frame is None:
+			return False
+
+		element = animation.element
+		for name, column in columns:
+			value = column[frame]
+			if value is not None:
+				element.set_computed(name, value)
+
+		return True
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+from os.path import join
+import subprocess
+
+from .rasterizer import GifEncoder, pixels_view
+
+
+class ExportError(Exception):
+	pass
+
+
+class Exporter:
+	def write(self, frame):
+		raise NotImplementedError
+
+	def close(self):
+		pass
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+class FramesExporter(Exporter):
+	def __init__(self, dirname, basename_format="frame_%04d.png"):
+		self.dirname = dirname
+		self.basename_format = basename_format
+		self.frame_count = 0
+
+		os.makedirs(self.dirname, exist_ok=True)
+
+	def write(self, frame):
+		self.frame_count += 1
+		frame.save(join(self.dirname, self.basename_format % self.frame_count))
+
+
+class GifExporter(Exporter):
+	# progress is called with the number of frames written to the file,
+	# which trails behind the frames given while they're being quantized
+	def __init__(self, filename, frame_rate, samples=None, progress=None):
+		self.filename = filename
+		self.frame_rate = frame_rate
+		self.samples = samples
+		self.progress = progress
+		self._encoder = None
+		self._previous = None
+
+	def write(self, frame):
+		if self._encoder is None:
+			width, height = frame.size()
+			self._encoder = GifEncoder(self.filename, width, height, self.frame_rate, self.samples, self.progress)
+			self.samples = None
+
+		# The renderer hands out the same image again for a duplicate
+		# frame, which only needs to extend how long the last frame lasts
+		if frame is self._previous:
+			self._encoder.repeat_frame()
+			return
+
+		self._encoder.write_frame(frame)
+		self._previous = frame
+
+	def close(self):
+		self._previous = None
+		if self._encoder is not None:
+			self._encoder.finish()
+			self._encoder = None
+
+
+class FFmpegExporter(Exporter):
+	def __init__(self, filename, frame_rate):
+		self.filename = filename
+		self.frame_rate = frame_rate
+		self._process = None
+
+	def _start(self, width, height):
+		return subprocess.Popen([
+			"ffmpeg",
+			"-y", "-loglevel", "error",
+			"-f", "rawvideo",
+			"-pix_fmt", "rgba",
+			"-s", f"{width}x{height}",
+			"-framerate", str(self.frame_rate),
+			"-i", "-",
+			"-pix_fmt", "yuv420p",
+			"-an", # Disable audio
+			self.filename,
+		], stdin=subprocess.PIPE)
+
+	def write(self, frame):
+		if self._process is None:
+			self._process = self._start(*frame.size())
+
+		with pixels_view(frame) as pixels:
+			self._process.stdin.write(pixels)
+
+	def _stop(self):
+		if self._process is None:
+			return 0
+
+		process, self._process = self._process, None
+
+		try:
+			process.stdin.close()
+		except BrokenPipeError:
+			# ffmpeg already exited, which its return code reports
+			pass
+
+		process.wait()
+
+		return process.returncode
+
+	def close(self):
+		returncode = self._stop()
+
+		if returncode != 0:
+			raise ExportError(f"ffmpeg exited with code {returncode}")
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		# When exiting due to an error, ffmpeg failing is likely caused by
+		# it, so the return code would only hide the actual error
+		if exc_type is None:
+			self.close()
+		else:
+			self._stop()
@@ -2,7 +2,10 @@
 # -*- coding: utf-8 -*-
 
 from .constantfolding import *
+from .timeinvariance import *
 
 
 def optimize(scene):
-	return fold_constants(scene)
+	scene = fold_constants(scene)
+	scene = mark_time_invariance(scene)
+	return scene
@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from ..elements import Animation, Keyframe
+
+
+def mark_time_invariance(scene):
+	# References resolve to the defined value of a property, never to the
+	# value an animation computed for it. So only keyframes can make
+	# a property vary over time, and nothing propagates to dependents
+	for element in scene.traverse():
+		for property in element.properties.values():
+			property.time_invariant = len(property.keyframes) == 0
+
+	for element in reversed(list(scene.traverse())):
+		if isinstance(element, (Animation, Keyframe)):
+			element.time_invariant = True
+		else:
+			element.time_invariant = all(property.time_invariant for property in element.properties.values())
+
+		element.static = element.time_invariant and all(child.static for child in element.children)
+
+	return scene
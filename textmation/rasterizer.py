@@ -3,9 +3,12 @@
 
 import os
 from os.path import join, dirname, abspath
+import ctypes
+from contextlib import contextmanager
+from array import array
 from importlib.util import spec_from_file_location, module_from_spec
 
-from rasterizer import Image, Font
+from rasterizer import Image, Font, GifEncoder
 
 
 _images = {}
@@ -30,5 +33,75 @@ def load_font(font):
 		return _font
 
 
+# The view references the image's own pixels instead of copying them.
+# The image cannot be modified, e.g. reused from an ImagePool, until the
+# with block exits and the view is released.
+@contextmanager
+def pixels_view(image):
+	address, length = image.acquire_view()
+	try:
+		buffer = (ctypes.c_uint8 * length).from_address(address)
+		with memoryview(buffer) as view, view.cast("B") as bytes_view, bytes_view.toreadonly() as readonly:
+			yield readonly
+	finally:
+		image.release_view()
+
+
+class DisplayList:
+	# Every command is an opcode followed by the same number of parameters,
+	# colors are clamped to 0-255 when the batch is drawn
+	Rect = 1
+	Line = 2
+	Circle = 3
+	Ellipse = 4
+
+	def __init__(self):
+		self._commands = array("d")
+
+	def __len__(self):
+		return len(self._commands) // 9
+
+	def draw_rect(self, x, y, w, h, fill):
+		self._commands.extend((DisplayList.Rect, x, y, w, h))
+		self._commands.extend(fill)
+
+	def draw_line(self, x1, y1, x2, y2, color):
+		self._commands.extend((DisplayList.Line, x1, y1, x2, y2))
+		self._commands.extend(color)
+
+	def draw_circle(self, cx, cy, r, fill):
+		self._commands.extend((DisplayList.Circle, cx, cy, r, 0))
+		self._commands.extend(fill)
+
+	def draw_ellipse(self, cx, cy, rx, ry, fill):
+		self._commands.extend((DisplayList.Ellipse, cx, cy, rx, ry))
+		self._commands.extend(fill)
+
+	def submit(self, image):
+		if len(self._commands) > 0:
+			image.draw_batch(self._commands.tobytes())
+			del self._commands[:]
+
+
+class ImagePool:
+	def __init__(self):
+		self._images = []
+
+	def acquire(self, width, height, background=None):
+		while self._images:
+			image = self._images.pop()
+			if image.size() == (width, height):
+				if background is not None:
+					image.clear(background)
+				return image
+
+		if background is None:
+			return Image(width, height)
+		return Image(width, height, background)
+
+	def release(self, image):
+		self._images.append(image)
+
+
 def to_color(color):
 	return tuple(max(min(r, 255), 0) for r in color)
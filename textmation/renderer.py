@@ -2,15 +2,20 @@
 # -*- coding: utf-8 -*-
 
 from contextlib import contextmanager, redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, get_all_start_methods
+from collections import deque
+from itertools import islice
 from operator import itemgetter
 from math import ceil
 from io import StringIO
 import sys
+import os
 
 from .datatypes import Point
-from .rasterizer import Image, load_image, load_font, to_color
+from .rasterizer import Image, ImagePool, DisplayList, load_image, load_font, to_color
 from .elements import Element, Scene, ImageFit, TextAnchor, TextAlignment
-from .utilities import iter_all_superclasses
+from .utilities import Visitor
 
 
 def calc_frame_count(duration, frame_rate, *, inclusive=False):
@@ -27,10 +32,17 @@ def iter_frame_time(duration, frame_rate, *, inclusive=False):
 		yield frame, time
 
 
-class Renderer:
+class Renderer(Visitor):
+	visitor_prefix = "_render_"
+	visitor_base = Element
+
 	def __init__(self):
 		self._image = None
+		self._display_list = DisplayList()
 		self._translations = [Point(0, 0)]
+		self._layer = None
+		self._frame = None
+		self._pool = ImagePool()
 
 	@property
 	def translation(self):
@@ -45,38 +57,78 @@ class Renderer:
 	def render(self, element):
 		assert isinstance(element, Element)
 		assert isinstance(element, Scene)
+
+		# A frame with the same signature as the previous one would be
+		# drawn exactly the same, so hand out the previous image again
+		signature = element.signature()
+		if signature is not None and self._frame is not None:
+			scene, revision, previous_signature, image = self._frame
+			if scene is element and revision == element.revision and previous_signature == signature:
+				return image
+
 		image = self._render(element)
 		assert isinstance(image, Image)
+
+		self._frame = element, element.revision, signature, image
+
 		return image
 
 	def _render(self, element):
 		assert isinstance(element, Element)
-
-		try:
-			method = f"_render_{element.__class__.__name__}"
-			visitor = getattr(self, method)
-		except AttributeError:
-			for cls in filter(lambda cls: issubclass(cls, Element), iter_all_superclasses(element.__class__)):
-				try:
-					method = f"_render_{cls.__name__}"
-					visitor = getattr(self, method)
-					break
-				except AttributeError:
-					pass
-			else:
-				raise
-
-		return visitor(element)
+		return self.visit(element)
 
 	def _render_children(self, element):
 		for child in element.elements:
 			self._render(child)
 
+	def _static_layer(self, scene):
+		if self._layer is not None and self._layer[0] is scene and self._layer[1] == scene.revision:
+			return self._layer[2:]
+
+		# Only the leading static subtrees can be drawn ahead of time,
+		# as anything after a time-varying element is drawn on top of it
+		count = 0
+		if scene.time_invariant:
+			for element in scene.elements:
+				if not element.static:
+					break
+				count += 1
+
+		layer = None
+		if count > 0:
+			layer = self._image = Image(max(int(scene.p_width), 0), max(int(scene.p_height), 0), to_color(scene.p_background))
+			for element in islice(scene.elements, count):
+				self._render(element)
+			self._flush()
+
+		self._layer = scene, scene.revision, layer, count
+		return layer, count
+
+	def release(self, image):
+		self._pool.release(image)
+
 	def _render_Scene(self, scene):
-		self._image = Image(max(int(scene.p_width), 0), max(int(scene.p_height), 0), to_color(scene.p_background))
-		self._render_children(scene)
+		layer, count = self._static_layer(scene)
+
+		width, height = max(int(scene.p_width), 0), max(int(scene.p_height), 0)
+
+		if layer is not None:
+			self._image = self._pool.acquire(width, height)
+			self._image.copy_from(layer)
+		else:
+			self._image = self._pool.acquire(width, height, to_color(scene.p_background))
+
+		for element in islice(scene.elements, count, None):
+			self._render(element)
+		self._flush()
+
 		return self._image
 
+	def _flush(self):
+		# Shapes are batched into a display list, which has to be drawn
+		# before anything that isn't part of it is drawn on top
+		self._display_list.submit(self._image)
+
 	def _render_Drawable(self, drawable):
 		with self.translate(Point(drawable.p_x, drawable.p_y)):
 			self._render_children(drawable)
@@ -91,7 +143,7 @@ class Renderer:
 		x, y = round(lx + tx), round(ly + ty)
 		w, h = max(round(rect.p_width), 0), max(round(rect.p_height), 0)
 
-		self._image.draw_rect((x, y, w, h), to_color(rect.p_fill))
+		self._display_list.draw_rect(x, y, w, h, rect.p_fill)
 
 		# TODO: rect.p_outline, rect.p_outline_width
 
@@ -103,7 +155,7 @@ class Renderer:
 		x1, y1 = round(line.p_x1 + tx), round(line.p_y1 + ty)
 		x2, y2 = round(line.p_x2 + tx), round(line.p_y2 + ty)
 
-		self._image.draw_line((x1, y1), (x2, y2), to_color(line.p_fill))
+		self._display_list.draw_line(x1, y1, x2, y2, line.p_fill)
 
 		# TODO: line.p_width
 
@@ -116,7 +168,7 @@ class Renderer:
 
 		r = max(round(circle.p_radius), 0)
 
-		self._image.draw_circle((cx, cy), r, to_color(circle.p_fill))
+		self._display_list.draw_circle(cx, cy, r, circle.p_fill)
 
 		# TODO: circle.p_outline, circle.p_outline_width
 
@@ -130,7 +182,7 @@ class Renderer:
 		rx, ry = ellipse.p_radius_x, ellipse.p_radius_y
 		rx, ry = max(round(rx), 0), max(round(ry), 0)
 
-		self._image.draw_ellipse((cx, cy), (rx, ry), to_color(ellipse.p_fill))
+		self._display_list.draw_ellipse(cx, cy, rx, ry, ellipse.p_fill)
 
 		# TODO: ellipse.p_outline, ellipse.p_outline_width
 
@@ -182,6 +234,7 @@ class Renderer:
 		# else: # elif fit == ImageFit.Fill:
 		# 	pass
 
+		self._flush()
 		self._image.draw_image((x, y, w, h), _image)
 
 		with self.translate(Point(lx, ly)):
@@ -227,6 +280,8 @@ class Renderer:
 
 		fill = to_color(text.p_fill)
 
+		self._flush()
+
 		if is_multiline:
 			alignment = text.p_alignment
 
@@ -258,8 +313,40 @@ def render(scene, time=0):
 	return _render(Renderer(), scene, time)
 
 
+def render_samples(scene, count=16, *, inclusive=True):
+	renderer = Renderer()
+
+	frame_rate = scene.p_frame_rate
+	frame_count = calc_frame_count(scene.p_duration.seconds, frame_rate, inclusive=inclusive)
+
+	step = max(frame_count // count, 1)
+
+	for frame in range(0, frame_count, step):
+		with redirect_stdout(StringIO()):
+			yield _render(renderer, scene, frame / frame_rate)
+
+
+def _write_progress(frame, frame_count):
+	sys.stdout.write(f"\rRendering Frame {frame+1:04d}/{frame_count:04d} ({(frame+1)/frame_count*100:.0f}%)")
+	sys.stdout.flush()
+
+
 # TODO: Consider removing "inclusive" and instead use "scene.p_inclusive"
-def render_animation(scene, *, inclusive=True):
+# With reuse_frames, a frame is only valid until the next one is requested
+# progress is called with the index of each frame before it's rendered
+def render_animation(scene, *, inclusive=True, jobs=1, reuse_frames=False, vectorize=False, progress=_write_progress):
+	if jobs is None:
+		jobs = os.cpu_count() or 1
+
+	if vectorize:
+		duration = scene.p_duration.seconds
+		frame_rate = scene.p_frame_rate
+		scene.vectorize([time for frame, time in iter_frame_time(duration, frame_rate, inclusive=inclusive)])
+
+	if jobs > 1:
+		yield from _render_animation_parallel(scene, inclusive=inclusive, jobs=jobs, progress=progress)
+		return
+
 	renderer = Renderer()
 
 	duration = scene.p_duration.seconds
@@ -269,17 +356,17 @@ def render_animation(scene, *, inclusive=True):
 
 	add_newline = False
 
-	frames = []
+	previous = None
+
 	for frame, time in iter_frame_time(duration, frame_rate, inclusive=inclusive):
 		# print(f"\rRendering Frame {frame+1:04d}/{frame_count:04d} ({(frame+1)/frame_count*100:.0f}%)")
 
-		sys.stdout.write(f"\rRendering Frame {frame+1:04d}/{frame_count:04d} ({(frame+1)/frame_count*100:.0f}%)")
-		sys.stdout.flush()
+		progress(frame, frame_count)
 
 		f = StringIO()
 		try:
 			with redirect_stdout(f):
-				frames.append(_render(renderer, scene, time))
+				image = _render(renderer, scene, time)
 		finally:
 			output = f.getvalue()
 			if output:
@@ -289,7 +376,110 @@ def render_animation(scene, *, inclusive=True):
 			elif frame == (frame_count - 1):
 				add_newline = True
 
+		yield image
+
+		# The previous frame is only recycled once a different frame was
+		# consumed, so a duplicate is never the same buffer as a new frame
+		if reuse_frames and (previous is not None) and (previous is not image):
+			renderer.release(previous)
+
+		previous = image
+
 	if add_newline:
 		sys.stdout.write("\n")
 
-	return frames
+
+_worker = None
+
+
+def _init_worker(scene):
+	global _worker
+	_worker = scene, Renderer()
+
+
+def _render_frames(frames):
+	scene, renderer = _worker
+	frame_rate = scene.p_frame_rate
+
+	results = []
+	previous = None
+	for frame in frames:
+		f = StringIO()
+		with redirect_stdout(f):
+			image = _render(renderer, scene, frame / frame_rate)
+
+		# Duplicate frames aren't sent back, the previous image is reused
+		if image is previous:
+			results.append((None, None, f.getvalue()))
+		else:
+			results.append((image.size(), image.to_bytes(), f.getvalue()))
+
+		previous = image
+
+	return results
+
+
+def _iter_chunks(frame_count, chunk_size):
+	for start in range(0, frame_count, chunk_size):
+		yield range(start, min(start + chunk_size, frame_count))
+
+
+def _render_animation_parallel(scene, *, inclusive, jobs, progress):
+	# Workers are forked so each one starts out with its own copy of the
+	# built scene, and with the rasterizer module the parent was given
+	if "fork" not in get_all_start_methods():
+		raise Exception("Rendering with multiple jobs is not supported on this platform")
+
+	duration = scene.p_duration.seconds
+	frame_rate = scene.p_frame_rate
+
+	frame_count = calc_frame_count(duration, frame_rate, inclusive=inclusive)
+
+	# Contiguous chunks amortize the round trip to the workers, while
+	# keeping enough chunks around for the load to stay balanced
+	chunk_size = max(1, min(16, frame_count // (jobs * 4)))
+	chunks = _iter_chunks(frame_count, chunk_size)
+
+	add_newline = False
+
+	with ProcessPoolExecutor(jobs, mp_context=get_context("fork"), initializer=_init_worker, initargs=(scene,)) as executor:
+		# Only keep a bounded number of chunks in flight, such that memory
+		# doesn't grow when the exporters can't keep up with the workers
+		pending = deque()
+
+		try:
+			for chunk in islice(chunks, jobs * 2):
+				pending.append(executor.submit(_render_frames, chunk))
+
+			frame = 0
+			image = None
+			while pending:
+				results = pending.popleft().result()
+
+				chunk = next(chunks, None)
+				if chunk is not None:
+					pending.append(executor.submit(_render_frames, chunk))
+
+				for size, data, output in results:
+					progress(frame, frame_count)
+
+					if output:
+						sys.stdout.write("\n")
+						sys.stdout.write(output)
+						sys.stdout.flush()
+					elif frame == (frame_count - 1):
+						add_newline = True
+
+					frame += 1
+
+					if data is not None:
+						width, height = size
+						image = Image.from_bytes(width, height, data)
+
+					yield image
+		finally:
+			for future in pending:
+				future.cancel()
+
+	if add_newline:
+		sys.stdout.write("\n")
@@ -10,6 +10,7 @@ from .parser import parse, _units, Node, Include, Create, Template, Name
 from .datatypes import Value, EnumType, FlagType, String, Number, Angle, AngleUnit, Time, TimeUnit, BinOp, UnaryOp, Call
 from .elements import Element, Scene, Percentage, ElementError, ElementPropertyDefinedError, ElementPropertyReadonlyError, ElementPropertyConstantError, CircularReferenceError
 from .functions import functions
+from .utilities import Visitor
 
 
 _scenes_dir = abspath(join(dirname(__file__), os.pardir, "scenes"))
@@ -20,7 +21,10 @@ class SceneBuilderError(Exception):
 	pass
 
 
-class SceneBuilder:
+class SceneBuilder(Visitor):
+	visitor_prefix = "_build_"
+	visitor_base = Node
+
 	def __init__(self):
 		self.templates = None
 		self._elements = None
@@ -165,9 +169,7 @@ class SceneBuilder:
 
 	def _build(self, node):
 		assert isinstance(node, Node)
-		method = "_build_%s" % node.__class__.__name__
-		visitor = getattr(self, method)
-		return visitor(node)
+		return self.visit(node)
 
 	def _build_children(self, node):
 		for child in node.children:
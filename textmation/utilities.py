@@ -35,3 +35,36 @@ def iter_all_subclasses(cls):
 	for cls in cls.__subclasses__():
 		yield cls
 		yield from iter_all_subclasses(cls)
+
+
+class Visitor:
+	# Visitor methods are named visitor_prefix followed by the class name,
+	# falling back to the closest superclass deriving from visitor_base
+	visitor_prefix = "visit_"
+	visitor_base = object
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		cls._visitors = {}
+
+	@classmethod
+	def resolve_visitor(cls, node_cls):
+		try:
+			return cls._visitors[node_cls]
+		except KeyError:
+			pass
+
+		for base in node_cls.__mro__:
+			if not issubclass(base, cls.visitor_base):
+				continue
+			visitor = getattr(cls, f"{cls.visitor_prefix}{base.__name__}", None)
+			if visitor is not None:
+				break
+		else:
+			raise AttributeError(f"{cls.__name__!r} object has no attribute {cls.visitor_prefix + node_cls.__name__!r}")
+
+		cls._visitors[node_cls] = visitor
+		return visitor
+
+	def visit(self, node):
+		return self.resolve_visitor(node.__class__)(self, node)